@@ -0,0 +1,240 @@
+# Frontend/alarm_scheduler.py
+import bisect
+import calendar
+import threading
+from collections import deque
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+
+DAY_NAMES = list(calendar.day_name)
+ALL_DAYS_MASK = (1 << len(DAY_NAMES)) - 1
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+FIRED_HISTORY = 256  # fired events kept for sessions to catch up on
+
+# -------------------------------
+# COMPACT ALARMS
+# -------------------------------
+def days_to_mask(days) -> int:
+    """Bit 0 is Monday ... bit 6 is Sunday."""
+    mask = 0
+    for day in days or []:
+        if day in DAY_NAMES:
+            mask |= 1 << DAY_NAMES.index(day)
+    return mask
+
+def mask_to_days(mask: int):
+    return [day for i, day in enumerate(DAY_NAMES) if mask & (1 << i)]
+
+def minute_of_week(when: datetime) -> int:
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+class Alarm(NamedTuple):
+    """One reminder as a minute of the day (0-1439) and a 7-bit day mask."""
+    key: str
+    minute: int
+    day_mask: int = ALL_DAYS_MASK
+    type: str = "habit_reminder"
+    enabled: bool = True
+
+    @classmethod
+    def from_time(cls, key, alarm_time, days=None, **fields):
+        mask = days_to_mask(days) if days is not None else ALL_DAYS_MASK
+        return cls(key, alarm_time.hour * 60 + alarm_time.minute, mask, **fields)
+
+    @property
+    def time(self) -> time:
+        return time(*divmod(self.minute, 60))
+
+    @property
+    def days(self):
+        return mask_to_days(self.day_mask)
+
+    @property
+    def hhmm(self) -> str:
+        return "%02d:%02d" % divmod(self.minute, 60)
+
+    @property
+    def label(self) -> str:
+        """12-hour time, as strftime('%I:%M %p') would render it."""
+        hour, minute = divmod(self.minute, 60)
+        return f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+    def minutes_of_week(self):
+        return [day * MINUTES_PER_DAY + self.minute for day in range(7) if self.day_mask & (1 << day)]
+
+def build_minute_index(alarms):
+    """{minute_of_week: [Alarm, ...]} for the enabled alarms."""
+    index = {}
+    for alarm in alarms:
+        if alarm.enabled:
+            for m in alarm.minutes_of_week():
+                index.setdefault(m, []).append(alarm)
+    return index
+
+def due_alarms(index, when: datetime):
+    """Alarms set for the minute containing `when` (one dict lookup)."""
+    return index.get(minute_of_week(when), [])
+
+def next_slot(minutes, after: datetime):
+    """(datetime, minute_of_week) of the first of the sorted `minutes` strictly after `after`."""
+    if not minutes:
+        return None
+    week_start = datetime.combine(after.date() - timedelta(days=after.weekday()), time())
+    i = bisect.bisect_right(minutes, minute_of_week(after))
+    if i == len(minutes):
+        week_start += timedelta(days=7)
+        i = 0
+    return week_start + timedelta(minutes=minutes[i]), minutes[i]
+
+def next_fire_time(alarms, after: datetime = None):
+    """When the first of `alarms` next fires after `after` (default now), or None."""
+    slot = next_slot(sorted(build_minute_index(alarms)), after or datetime.now())
+    return slot[0] if slot else None
+
+def weekly_alarm(weekly_settings):
+    """Alarm for the alarm_settings.json weekly reminder, or None if it is off or invalid."""
+    if not weekly_settings or not weekly_settings.get("enabled", True) or not weekly_settings.get("time"):
+        return None
+    try:
+        weekly_time = datetime.strptime(weekly_settings["time"], "%H:%M").time()
+    except ValueError:
+        print(f"Invalid weekly alarm time: {weekly_settings.get('time')}")
+        return None
+    return Alarm.from_time("weekly_alarm", weekly_time, weekly_settings.get("days", []), type="weekly")
+
+# -------------------------------
+# SCHEDULER
+# -------------------------------
+class AlarmScheduler:
+    """
+    Next-fire-time scheduler, shared by every session in the process.
+
+    Alarms are indexed by minute of the week. A single daemon thread finds
+    the next indexed minute with a bisect over the sorted keys, sleeps until
+    it and records everything set for that minute with an increasing
+    sequence number; each session reads what it has not seen yet with
+    fired_since(). With a settings store, refresh() rebuilds the weekly
+    alarm whenever the file's stamp changes, and the thread checks it again
+    before firing, so a save from any session or process is picked up.
+    """
+
+    def __init__(self, settings_store=None):
+        self._store = settings_store
+        self._stamp = None
+        self._index = {}
+        self._minutes = []
+        self._after = datetime.now()
+        self._cond = threading.Condition()  # reentrant: refresh() runs inside _run
+        self._fired = deque(maxlen=FIRED_HISTORY)
+        self._seq = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def set_alarms(self, alarms, weekly_settings=None, after=None):
+        """
+        Rebuild the schedule. `alarms` is a habit_name -> Alarm dict;
+        `weekly_settings` is the alarm_settings.json content. Only minutes
+        after `after` (default now) are fired.
+        """
+        entries = list((alarms or {}).values())
+        weekly = weekly_alarm(weekly_settings)
+        if weekly:
+            entries.append(weekly)
+        index = build_minute_index(entries)
+
+        with self._cond:
+            self._index = index
+            self._minutes = sorted(index)
+            self._after = after or datetime.now()
+            self._cond.notify()
+
+    def refresh(self, after=None):
+        """Reload the weekly alarm if the settings file changed; True if it did."""
+        if self._store is None:
+            return False
+        with self._cond:
+            stamp = self._store.stamp()
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            self.set_alarms({}, self._store.load(), after)
+            return True
+
+    def next_fire_at(self):
+        """Datetime of the next scheduled alarm, or None."""
+        with self._cond:
+            slot = next_slot(self._minutes, self._after)
+            return slot[0] if slot else None
+
+    def fired_since(self, seq):
+        """
+        (events fired after sequence number `seq`, latest sequence number).
+        Pass None on first use to start from now; keep the returned number
+        per session and pass it back on the next call.
+        """
+        with self._cond:
+            if seq is None:
+                return [], self._seq
+            return [dict(e) for e in self._fired if e["seq"] > seq], self._seq
+
+    def _run(self):
+        with self._cond:
+            while self._running:
+                slot = next_slot(self._minutes, self._after)
+                if slot is None:
+                    self._cond.wait()
+                    continue
+
+                fire_at, _ = slot
+                delay = (fire_at - datetime.now()).total_seconds()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                # Settings saved elsewhere since the last rerun; keep this minute eligible
+                if self.refresh(after=fire_at - timedelta(minutes=1)):
+                    continue
+
+                triggered_at = datetime.now()
+                for alarm in due_alarms(self._index, fire_at):
+                    self._seq += 1
+                    self._fired.append({
+                        "seq": self._seq,
+                        "key": alarm.key,
+                        "type": alarm.type,
+                        "alarm_time": alarm.time,
+                        "days": alarm.days,
+                        "fire_at": fire_at,
+                        "triggered_at": triggered_at,
+                    })
+                self._after = fire_at
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler(settings_store):
+    """
+    The process-wide scheduler for the weekly alarm in settings_store,
+    started on first use and refreshed from the store on every call.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AlarmScheduler(settings_store)
+            _scheduler.start()
+    _scheduler.refresh()
+    return _scheduler
@@ -0,0 +1,100 @@
+# Frontend/alarm_store.py
+import os
+import pickle
+import sqlite3
+import threading
+
+from alarm_scheduler import Alarm, DAY_NAMES, days_to_mask
+
+ALARM_DB = os.getenv("HABITHUB_ALARM_DB", "alarms.db")
+
+# One connection for the whole process; Streamlit sessions share it under the lock
+_conn = None
+_lock = threading.Lock()
+
+# -------------------------------
+# CONNECTION
+# -------------------------------
+def get_connection():
+    """Return the shared alarm database connection, creating the schema on first use."""
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(ALARM_DB, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # The (user_id, habit_name) primary key also serves user_id lookups
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS habit_alarms (
+                user_id TEXT NOT NULL,
+                habit_name TEXT NOT NULL,
+                alarm_time TEXT NOT NULL,
+                day_mask INTEGER NOT NULL DEFAULT 127,
+                enabled INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (user_id, habit_name)
+            ) WITHOUT ROWID
+        ''')
+        _migrate_pickled_alarms(conn)
+        conn.commit()
+        _conn = conn
+    return _conn
+
+def _migrate_pickled_alarms(conn):
+    """Move rows from the old pickle-BLOB alarms table into habit_alarms, once."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alarms'").fetchone()
+    if not exists:
+        return
+    rows = []
+    for user_id, habit_name, blob in conn.execute("SELECT user_id, habit_name, alarm_data FROM alarms"):
+        try:
+            data = pickle.loads(blob)
+            rows.append((user_id, habit_name, data["alarm_time"][:5], days_to_mask(data.get("days", DAY_NAMES)), 1))
+        except Exception as e:
+            print(f"Skipping unreadable alarm {habit_name!r}: {e}")
+    conn.executemany("INSERT OR REPLACE INTO habit_alarms VALUES (?, ?, ?, ?, ?)", rows)
+    conn.execute("DROP TABLE alarms")
+    print(f"Migrated {len(rows)} alarms to habit_alarms")
+
+# -------------------------------
+# READ / WRITE
+# -------------------------------
+def load_alarms(user_id):
+    """{habit_name: Alarm} for a user, as the app keeps them in session state."""
+    with _lock:
+        rows = get_connection().execute(
+            "SELECT habit_name, alarm_time, day_mask, enabled FROM habit_alarms WHERE user_id = ?",
+            (str(user_id),),
+        ).fetchall()
+    alarms = {}
+    for habit_name, alarm_time, day_mask, enabled in rows:
+        hour, minute = alarm_time.split(":")
+        alarms[habit_name] = Alarm(habit_name, int(hour) * 60 + int(minute), day_mask, enabled=bool(enabled))
+    return alarms
+
+def upsert_alarm(user_id, alarm: Alarm):
+    """Insert or update one alarm."""
+    try:
+        with _lock:
+            conn = get_connection()
+            with conn:
+                conn.execute(
+                    '''INSERT INTO habit_alarms (user_id, habit_name, alarm_time, day_mask, enabled)
+                       VALUES (?, ?, ?, ?, ?)
+                       ON CONFLICT (user_id, habit_name) DO UPDATE
+                       SET alarm_time = excluded.alarm_time, day_mask = excluded.day_mask, enabled = excluded.enabled''',
+                    (str(user_id), alarm.key, alarm.hhmm, alarm.day_mask, 1 if alarm.enabled else 0),
+                )
+        return True
+    except sqlite3.Error as e:
+        print(f"Error saving alarm to DB: {e}")
+        return False
+
+def delete_alarm(user_id, habit_name):
+    try:
+        with _lock:
+            conn = get_connection()
+            with conn:
+                conn.execute("DELETE FROM habit_alarms WHERE user_id = ? AND habit_name = ?", (str(user_id), habit_name))
+        return True
+    except sqlite3.Error as e:
+        print(f"Error deleting alarm from DB: {e}")
+        return False
@@ -0,0 +1,107 @@
+# Frontend/api_client.py
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.getenv("HABITHUB_API_URL", "http://127.0.0.1:8000")
+
+# Timeouts are (connect, read) in seconds
+CONNECT_TIMEOUT = float(os.getenv("HABITHUB_API_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("HABITHUB_API_READ_TIMEOUT", "10"))
+MAX_RETRIES = int(os.getenv("HABITHUB_API_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("HABITHUB_API_BACKOFF", "0.3"))
+POOL_SIZE = int(os.getenv("HABITHUB_API_POOL_SIZE", "10"))
+
+_session = None
+_session_lock = threading.Lock()
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+# -------------------------------
+# SESSION
+# -------------------------------
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Only connection failures are retried: the request never reached
+                # the server. A read timeout or 502/503/504 may come after the
+                # server already handled the POST, so those are never replayed.
+                retry = Retry(
+                    total=MAX_RETRIES,
+                    connect=MAX_RETRIES,
+                    read=0,
+                    status=0,
+                    backoff_factor=BACKOFF_FACTOR,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def safe_json(resp):
+    try:
+        return resp.json()
+    except:
+        return {}
+
+# -------------------------------
+# REQUESTS
+# -------------------------------
+def post(path, payload=None, timeout=None, token=None):
+    """POST JSON to the API through the shared session and record its latency."""
+    started = time.perf_counter()
+    failed = False
+    headers = {"Authorization": f"Bearer {token}"} if token else None
+    try:
+        return get_session().post(
+            f"{API_URL}{path}",
+            json=payload,
+            headers=headers,
+            timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT),
+        )
+    except requests.RequestException:
+        failed = True
+        raise
+    finally:
+        _record_latency(path, time.perf_counter() - started, failed)
+
+def post_json(path, payload=None, timeout=None, token=None):
+    """POST JSON and return the decoded body ({} if it is not JSON)."""
+    return safe_json(post(path, payload, timeout, token))
+
+# -------------------------------
+# METRICS
+# -------------------------------
+def _record_latency(path, seconds, failed):
+    with _metrics_lock:
+        m = _metrics.setdefault(path, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = seconds * 1000
+        m["count"] += 1
+        m["total_ms"] += ms
+        m["max_ms"] = max(m["max_ms"], ms)
+        if failed:
+            m["errors"] += 1
+
+def get_latency_metrics():
+    """Return per-endpoint call counts, errors and average/max latency in ms."""
+    with _metrics_lock:
+        return {
+            path: {
+                "count": m["count"],
+                "errors": m["errors"],
+                "avg_ms": round(m["total_ms"] / m["count"], 1) if m["count"] else 0,
+                "max_ms": round(m["max_ms"], 1),
+            }
+            for path, m in _metrics.items()
+        }
@@ -1,28 +1,38 @@
 import streamlit as st
-import requests
-import json
 from datetime import datetime, timedelta, time
 import time
-import matplotlib.pyplot as plt
 import pandas as pd
 import os
 import base64
-import numpy as np
-import math
 import threading
 import pygame
 import calendar
-import sqlite3
-import pickle
 import random
-
-API_URL = "http://127.0.0.1:8000"
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+import alarm_scheduler
+import alarm_store
+import api_client
+import charts
+import config_store
+import ttl_cache
+import tone_bank
+import history_store
+import habit_session
 
 # ---------- File Paths ----------
 ALARM_FILE = "alarm_settings.json"
 HABITS_FILE = "habit_data.json"
 WEEKLY_REPORT_FILE = "weekly_reports.json"
 
+# Shared across sessions; re-read only when the file changes on disk
+alarm_settings_store = config_store.get_store(ALARM_FILE)
+habit_data_store = config_store.get_store(HABITS_FILE)
+
+# Seconds a user's today-status response is reused across reruns
+TODAY_STATUS_TTL = 30
+
 # ---------- Motivational Messages ----------
 MOTIVATIONAL_QUOTES = [
     "🌞 Rise and shine! Let's make today count!",
@@ -50,310 +60,133 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# -------------------------------
-# PERSISTENT ALARM STORAGE
-# -------------------------------
-def init_alarm_database():
-    """Initialize SQLite database for persistent alarm storage"""
-    conn = sqlite3.connect('alarms.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS alarms
-        (user_id TEXT, habit_name TEXT, alarm_data BLOB, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
-    ''')
-    conn.commit()
-    conn.close()
-
-def save_alarms_to_db(user_id, alarms):
-    """Save alarms to persistent database"""
-    try:
-        conn = sqlite3.connect('alarms.db')
-        c = conn.cursor()
-        
-        # Delete existing alarms for this user
-        c.execute("DELETE FROM alarms WHERE user_id = ?", (user_id,))
-        
-        # Save new alarms
-        for habit_name, alarm_data in alarms.items():
-            # Convert datetime objects to strings for serialization
-            serializable_alarm = {
-                'habit_name': alarm_data['habit_name'],
-                'alarm_time': alarm_data['alarm_time'].strftime('%H:%M:%S'),
-                'triggered': alarm_data.get('triggered', False),
-                'recurring': alarm_data.get('recurring', True),
-                'days': alarm_data.get('days', ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
-            }
-            c.execute("INSERT INTO alarms (user_id, habit_name, alarm_data) VALUES (?, ?, ?)",
-                     (user_id, habit_name, pickle.dumps(serializable_alarm)))
-        
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        print(f"Error saving alarms to DB: {e}")
-        return False
-
-def load_alarms_from_db(user_id):
-    """Load alarms from persistent database"""
-    try:
-        conn = sqlite3.connect('alarms.db')
-        c = conn.cursor()
-        c.execute("SELECT habit_name, alarm_data FROM alarms WHERE user_id = ?", (user_id,))
-        rows = c.fetchall()
-        conn.close()
-        
-        alarms = {}
-        for habit_name, alarm_blob in rows:
-            alarm_data = pickle.loads(alarm_blob)
-            # Convert string time back to time object
-            alarm_time = datetime.strptime(alarm_data['alarm_time'], '%H:%M:%S').time()
-            
-            alarms[habit_name] = {
-                'habit_name': alarm_data['habit_name'],
-                'alarm_time': alarm_time,
-                'triggered': alarm_data.get('triggered', False),
-                'recurring': alarm_data.get('recurring', True),
-                'days': alarm_data.get('days', ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
-            }
-        
-        return alarms
-    except Exception as e:
-        print(f"Error loading alarms from DB: {e}")
-        return {}
-
-# Initialize database on startup
-init_alarm_database()
-
 # -------------------------------
 # SESSION STATE INIT
 # -------------------------------
-if "page" not in st.session_state:
-    st.session_state.page = "auth"
-if "user" not in st.session_state:
-    st.session_state.user = None
-if "completed_habits" not in st.session_state:
-    st.session_state.completed_habits = set()
-if "deleted_habits" not in st.session_state:
-    st.session_state.deleted_habits = set()
-if "show_success" not in st.session_state:
-    st.session_state.show_success = False
-if "today_habits" not in st.session_state:
-    st.session_state.today_habits = []
-if "active_timers" not in st.session_state:
-    st.session_state.active_timers = {}
-if "timer_history" not in st.session_state:
-    st.session_state.timer_history = []
-if "welcome_shown" not in st.session_state:
-    st.session_state.welcome_shown = False
-if "habit_targets" not in st.session_state:
-    st.session_state.habit_targets = {}
-if "auth_mode" not in st.session_state:
-    st.session_state.auth_mode = "login"
-if "alarms" not in st.session_state:
-    st.session_state.alarms = {}
-if "alarm_history" not in st.session_state:
-    st.session_state.alarm_history = []
-if "user_habits_data" not in st.session_state:
-    st.session_state.user_habits_data = []
-if "user_monthly_data" not in st.session_state:
-    st.session_state.user_monthly_data = []
-if "last_reset_date" not in st.session_state:
-    st.session_state.last_reset_date = None
-if "alarm_check_interval" not in st.session_state:
-    st.session_state.alarm_check_interval = 0
-if "weekly_stars" not in st.session_state:
-    st.session_state.weekly_stars = 0
-if "last_alarm_check" not in st.session_state:
-    st.session_state.last_alarm_check = None
-if "user_alarms" not in st.session_state:
-    st.session_state.user_alarms = {}
-if "alarm_threads" not in st.session_state:
-    st.session_state.alarm_threads = {}
-if "alarms_initialized" not in st.session_state:
-    st.session_state.alarms_initialized = False
-if "last_alarm_trigger" not in st.session_state:
-    st.session_state.last_alarm_trigger = {}
-if "alarm_thread_started" not in st.session_state:
-    st.session_state.alarm_thread_started = False
-if "last_alarm_check_time" not in st.session_state:
-    st.session_state.last_alarm_check_time = None
-if "alarm_sound_playing" not in st.session_state:
-    st.session_state.alarm_sound_playing = False
-if "weekly_report_generated" not in st.session_state:
-    st.session_state.weekly_report_generated = False
-if "current_week_number" not in st.session_state:
-    st.session_state.current_week_number = datetime.now().isocalendar()[1]
-if "show_alarm_popup" not in st.session_state:
-    st.session_state.show_alarm_popup = False
-if "alarm_popup_message" not in st.session_state:
-    st.session_state.alarm_popup_message = ""
-if "alarm_popup_type" not in st.session_state:
-    st.session_state.alarm_popup_type = ""
-if "current_page" not in st.session_state:
-    st.session_state.current_page = "home"
-if "daily_habits_loaded" not in st.session_state:
-    st.session_state.daily_habits_loaded = False
-if "alarm_notification" not in st.session_state:
-    st.session_state.alarm_notification = None
-if "active_alarm_sound" not in st.session_state:
-    st.session_state.active_alarm_sound = None
-if "today_date_key" not in st.session_state:
-    st.session_state.today_date_key = None
+# All per-session state lives in one HabitSession (see habit_session.py)
+sess = habit_session.current()
 
 # -------------------------------
-# ENHANCED DAILY RESET & JSON STORAGE - FIXED
+# ENHANCED DAILY RESET & HISTORY STORAGE - FIXED
 # -------------------------------
-def save_daily_habits_to_json():
-    """Save today's habits to JSON file for historical data"""
-    if not st.session_state.user or not st.session_state.today_habits:
+def save_daily_habits_to_history():
+    """Save today's habits to the history store"""
+    if not sess.user or not sess.today_habits:
         return
     
     try:
-        today_str = datetime.now().strftime('%Y%m%d')
-        user_id = st.session_state.user["user_id"]
-        
-        # Load existing data for today
-        history_file = f"habit_history_{today_str}.json"
-        day_data = {}
-        
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                day_data = json.load(f)
-        
-        # Update with current user's habits
-        day_data[user_id] = st.session_state.today_habits
-        
-        # Save back to file
-        with open(history_file, 'w') as f:
-            json.dump(day_data, f, indent=2, default=str)
-            
+        user_id = sess.user["user_id"]
+        history_store.save_day(user_id, datetime.now().date(), sess.today_habits)
     except Exception as e:
-        print(f"Error saving habits to JSON: {e}")
+        print(f"Error saving habits to history: {e}")
 
-def load_previous_habits_from_json(user_id, date):
-    """Load habits for a specific date from JSON"""
+def load_previous_habits_from_history(user_id, date):
+    """Load habits for a specific date from the history store"""
     try:
-        date_str = date.strftime('%Y%m%d')
-        history_file = f"habit_history_{date_str}.json"
-        
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                day_data = json.load(f)
-                return day_data.get(user_id, [])
-        return []
+        return history_store.load_day(user_id, date)
     except Exception as e:
         print(f"Error loading previous habits: {e}")
         return []
 
-def cleanup_old_habit_files():
-    """Delete habit files older than 30 days"""
+def cleanup_old_history():
+    """Delete history older than 30 days"""
     try:
-        today = datetime.now().date()
-        cutoff_date = today - timedelta(days=30)
-        
-        for filename in os.listdir('.'):
-            if filename.startswith('habit_history_') and filename.endswith('.json'):
-                # Extract date from filename
-                date_str = filename.replace('habit_history_', '').replace('.json', '')
-                try:
-                    file_date = datetime.strptime(date_str, '%Y%m%d').date()
-                    if file_date < cutoff_date:
-                        os.remove(filename)
-                        print(f"Deleted old habit file: {filename}")
-                except ValueError:
-                    continue
+        cutoff_date = datetime.now().date() - timedelta(days=30)
+        removed = history_store.delete_before(cutoff_date)
+        if removed:
+            print(f"Deleted {removed} old history rows")
     except Exception as e:
-        print(f"Error cleaning up old files: {e}")
+        print(f"Error cleaning up old history: {e}")
 
 def initialize_daily_habits():
-    """Enhanced daily reset with JSON storage - COMPLETELY FRESH START EVERY DAY"""
-    if not st.session_state.user:
+    """Enhanced daily reset with history storage - COMPLETELY FRESH START EVERY DAY"""
+    if not sess.user:
         return
     
     today = datetime.now().date()
     current_week = datetime.now().isocalendar()[1]
     
     # Create a unique key for today to track fresh start
-    today_key = f"{today.strftime('%Y%m%d')}_{st.session_state.user['user_id']}"
+    today_key = f"{today.strftime('%Y%m%d')}_{sess.user['user_id']}"
 
     # Check if week has changed
-    if st.session_state.current_week_number != current_week:
-        st.session_state.current_week_number = current_week
-        st.session_state.weekly_report_generated = False
+    if sess.current_week_number != current_week:
+        sess.current_week_number = current_week
+        sess.weekly_report_generated = False
 
     # Check if it's a new day - COMPLETELY RESET HABITS
-    if (st.session_state.today_date_key != today_key or
-        not st.session_state.daily_habits_loaded):
+    if (sess.today_date_key != today_key or
+        not sess.daily_habits_loaded):
         
-        # If we have previous data, save it to JSON before resetting
-        if (st.session_state.today_date_key and 
-            st.session_state.today_date_key != today_key and 
-            st.session_state.today_habits):
-            save_daily_habits_to_json()
+        # If we have previous data, save it to history before resetting
+        if (sess.today_date_key and 
+            sess.today_date_key != today_key and 
+            sess.today_habits):
+            save_daily_habits_to_history()
         
         # COMPLETE RESET for new day - NO HABITS CARRIED OVER
-        st.session_state.today_date_key = today_key
-        st.session_state.last_reset_date = today
-        st.session_state.today_habits = []  # EMPTY LIST - FRESH START
-        st.session_state.deleted_habits = set()
-        st.session_state.completed_habits = set()
-        st.session_state.active_timers = {}
-        st.session_state.daily_habits_loaded = True
-        
-        # Clean up old files (runs occasionally)
+        sess.today_date_key = today_key
+        sess.last_reset_date = today
+        sess.today_habits = []  # EMPTY LIST - FRESH START
+        sess.deleted_habits = set()
+        sess.completed_habits = set()
+        sess.active_timers = {}
+        sess.daily_habits_loaded = True
+        
+        # Clean up old history (runs occasionally)
         if today.day % 7 == 0:  # Run cleanup once a week
-            cleanup_old_habit_files()
+            cleanup_old_history()
         
         st.rerun()
 
 def load_fresh_habits():
     """Load fresh habits for today - previous habits don't carry over"""
-    if st.session_state.user:
+    if sess.user:
         # Get habits from API but only use today's habits
-        today_data = today_status_api(st.session_state.user["user_id"])
+        today_data = get_today_status(sess.user["user_id"])
         if today_data.get("success"):
             # Only show habits that have logs for today
-            st.session_state.today_habits = today_data["habits"]
+            sess.today_habits = today_data["habits"]
             
             # Update completed habits in session state
-            st.session_state.completed_habits = set()
-            for habit in st.session_state.today_habits:
+            sess.completed_habits = set()
+            for habit in sess.today_habits:
                 if habit.get("completed"):
-                    st.session_state.completed_habits.add(habit["habit_id"])
+                    sess.completed_habits.add(habit["habit_id"])
 
 # -------------------------------
 # GLOBAL ALARM POPUP SYSTEM
 # -------------------------------
 def show_alarm_popup(message, alarm_type="info"):
     """Show alarm popup on any page"""
-    st.session_state.show_alarm_popup = True
-    st.session_state.alarm_popup_message = message
-    st.session_state.alarm_popup_type = alarm_type
+    sess.show_alarm_popup = True
+    sess.alarm_popup_message = message
+    sess.alarm_popup_type = alarm_type
 
 def render_alarm_popup():
     """Render alarm popup if triggered"""
-    if st.session_state.show_alarm_popup:
+    if sess.show_alarm_popup:
         # Use Streamlit's native modal or create a custom one
-        if st.session_state.alarm_popup_type == "warning":
-            st.warning(st.session_state.alarm_popup_message)
-        elif st.session_state.alarm_popup_type == "error":
-            st.error(st.session_state.alarm_popup_message)
-        elif st.session_state.alarm_popup_type == "success":
-            st.success(st.session_state.alarm_popup_message)
+        if sess.alarm_popup_type == "warning":
+            st.warning(sess.alarm_popup_message)
+        elif sess.alarm_popup_type == "error":
+            st.error(sess.alarm_popup_message)
+        elif sess.alarm_popup_type == "success":
+            st.success(sess.alarm_popup_message)
         else:
-            st.info(st.session_state.alarm_popup_message)
+            st.info(sess.alarm_popup_message)
         
         # Add a close button with unique key based on current page
-        current_page = st.session_state.get('current_page', 'unknown')
+        current_page = sess.current_page
         close_key = f"close_alarm_popup_{current_page}"
         
         if st.button("Close Notification", key=close_key):
-            st.session_state.show_alarm_popup = False
+            sess.show_alarm_popup = False
             st.rerun()
 
 def show_alarm_notification(message):
     """Show alarm notification that appears automatically"""
-    st.session_state.alarm_notification = message
+    sess.alarm_notification = message
     # Use JavaScript to show a browser notification
     js_code = f"""
     <script>
@@ -549,77 +382,126 @@ def apply_cartoon_styles():
 # -------------------------------
 # API HELPERS - UPDATED FOR YOUR DATABASE TABLES
 # -------------------------------
-def safe_json(resp):
-    try:
-        return resp.json()
-    except:
-        return {}
+def session_token():
+    """Signed session token issued by the API at login/registration"""
+    return (sess.user or {}).get("token")
 
 def register_api(name, email, password):
     try:
-        resp = requests.post(f"{API_URL}/auth/register", 
-                            json={"name": name, "email": email, "password": password})
-        return safe_json(resp)
+        return api_client.post_json("/auth/register", 
+                                    {"name": name, "email": email, "password": password})
     except:
         return {"success": False, "error": "Connection failed"}
 
 def login_api(email, password):
     try:
-        resp = requests.post(f"{API_URL}/auth/login", 
-                            json={"email": email, "password": password})
-        return safe_json(resp)
+        return api_client.post_json("/auth/login", 
+                                    {"email": email, "password": password})
     except:
         return {"success": False, "error": "Connection failed"}
 
 def add_habit_api_backend(name, desc, user_id, target_minutes=25):
     try:
-        resp = requests.post(f"{API_URL}/habit/add", 
-                            json={
-                                "name": name, 
-                                "description": desc, 
-                                "user_id": user_id, 
-                                "target_minutes": target_minutes
-                            })
-        return safe_json(resp)
+        return api_client.post_json("/habit/add", 
+                                    {
+                                        "name": name, 
+                                        "description": desc, 
+                                        "target_minutes": target_minutes
+                                    }, token=session_token())
     except:
         return {"success": False, "error": "Connection failed"}
 
-def list_habits_api(user_id):
+LISTED_HABIT_FIELDS = ["habit_id", "name", "description"]  # what the habit pages render
+
+def list_habits_api(user_id, fields=LISTED_HABIT_FIELDS):
+    habits = []
+    cursor = None
     try:
-        resp = requests.post(f"{API_URL}/habit/list", json={"user_id": user_id})
-        data = safe_json(resp)
-        return data.get("habits", []) if data.get("success") else []
+        while True:
+            data = api_client.post_json("/habit/list",
+                                        {"fields": fields, "limit": 500, "cursor": cursor},
+                                        token=session_token())
+            if not data.get("success"):
+                return habits
+            habits.extend(data.get("habits", []))
+            cursor = data.get("next_cursor")
+            if not cursor:
+                return habits
     except:
-        return []
+        return habits
 
 def complete_habit_api_backend(hid, user_id):
     try:
-        resp = requests.post(f"{API_URL}/habit/complete", 
-                            json={"habit_id": hid, "user_id": user_id})
-        return safe_json(resp)
+        return api_client.post_json("/habit/complete", 
+                                    {"habit_id": hid}, token=session_token())
     except:
         return {"success": False, "error": "Connection failed"}
 
 def remove_habit_api_backend(hid, user_id):
     try:
-        resp = requests.post(f"{API_URL}/habit/remove", 
-                            json={"habit_id": hid, "user_id": user_id})
-        return safe_json(resp)
+        return api_client.post_json("/habit/remove", 
+                                    {"habit_id": hid}, token=session_token())
+    except:
+        return {"success": False, "error": "Connection failed"}
+
+def complete_habits_batch_api_backend(habit_ids, user_id):
+    try:
+        return api_client.post_json("/habit/complete-batch", 
+                                    {"habit_ids": list(habit_ids)}, token=session_token())
     except:
         return {"success": False, "error": "Connection failed"}
 
 def today_status_api(user_id):
     try:
-        resp = requests.post(f"{API_URL}/habit/today-status", json={"user_id": user_id})
-        return safe_json(resp)
+        return api_client.post_json("/habit/today-status", token=session_token())
     except:
         return {"success": False, "error": "Connection failed"}
 
+def set_reminder_api(user_id, habit_name, alarm_time, days):
+    try:
+        return api_client.post_json("/reminders/set", 
+                                    {
+                                        "habit_name": habit_name, 
+                                        "alarm_time": alarm_time.strftime("%H:%M"), 
+                                        "days": days
+                                    }, token=session_token())
+    except:
+        return {"success": False, "error": "Connection failed"}
+
+def remove_reminder_api(user_id, habit_name):
+    try:
+        return api_client.post_json("/reminders/remove", 
+                                    {"habit_name": habit_name}, token=session_token())
+    except:
+        return {"success": False, "error": "Connection failed"}
+
+def list_reminders_api(user_id):
+    try:
+        return api_client.post_json("/reminders/list", token=session_token())
+    except:
+        return {"success": False, "error": "Connection failed"}
+
+def reminder_events_api(user_id):
+    try:
+        return api_client.post_json("/reminders/events", token=session_token())
+    except:
+        return {"success": False, "error": "Connection failed"}
+
+@ttl_cache.cache_data(ttl=TODAY_STATUS_TTL)
+def cached_today_status(user_id, day):
+    """Today's status for a user, cached per (user_id, date)"""
+    return today_status_api(user_id)
+
+def get_today_status(user_id):
+    return cached_today_status(user_id, datetime.now().date().isoformat())
+
+def invalidate_today_status(user_id):
+    cached_today_status.clear(user_id, datetime.now().date().isoformat())
+
 def weekly_perf_api(user_id):
     """Get weekly performance from database"""
     try:
-        resp = requests.post(f"{API_URL}/habit/weekly-performance", json={"user_id": user_id})
-        data = safe_json(resp)
+        data = api_client.post_json("/habit/weekly-performance", token=session_token())
         
         if data.get("success"):
             return data
@@ -662,6 +544,7 @@ def add_habit_api(habit_name, habit_description, user_id, target_minutes):
     # This now only updates the backend database
     result = add_habit_api_backend(habit_name, habit_description, user_id, target_minutes)
     if result.get("success"):
+        invalidate_today_status(user_id)
         # Reload habits from database - ONLY TODAY'S HABITS
         load_fresh_habits()
     return result
@@ -670,19 +553,33 @@ def complete_habit_api(habit_id, user_id):
     # Update backend database
     result = complete_habit_api_backend(habit_id, user_id)
     if result.get("success"):
+        invalidate_today_status(user_id)
         # Update local state - ONLY FOR TODAY'S HABITS
-        for habit in st.session_state.today_habits:
+        for habit in sess.today_habits:
             if habit["habit_id"] == habit_id:
                 habit["completed"] = True
     return result
 
+def complete_habits_api(habit_ids, user_id):
+    # One backend call for several habits
+    result = complete_habits_batch_api_backend(habit_ids, user_id)
+    if result.get("success"):
+        invalidate_today_status(user_id)
+        completed = {hid for hid, status in result.get("results", {}).items()
+                     if status in ("completed", "already_completed")}
+        for habit in sess.today_habits:
+            if habit["habit_id"] in completed:
+                habit["completed"] = True
+    return result
+
 def remove_habit_api(habit_id, user_id):
     # Update backend database
     result = remove_habit_api_backend(habit_id, user_id)
     if result.get("success"):
+        invalidate_today_status(user_id)
         # Update local state - ONLY TODAY'S HABITS
-        st.session_state.today_habits = [h for h in st.session_state.today_habits if h["habit_id"] != habit_id]
-        st.session_state.deleted_habits.add(habit_id)
+        sess.today_habits = [h for h in sess.today_habits if h["habit_id"] != habit_id]
+        sess.deleted_habits.add(habit_id)
     return result
 
 # -------------------------------
@@ -691,65 +588,37 @@ def remove_habit_api(habit_id, user_id):
 def play_alarm():
     """Enhanced alarm sound with multiple fallback methods"""
     try:
-        # Try different sound file names with different paths
-        sound_files = [
-            "alarm.mp3", 
-            "alarm.wav", 
-            "alarm_sound.mp3", 
-            "beep.mp3",
-            "./alarm.mp3",
-            "./sounds/alarm.mp3"
-        ]
-        sound_path = None
-        
-        for file in sound_files:
-            if os.path.exists(file):
-                sound_path = file
-                print(f"Found alarm sound: {sound_path}")
-                break
+        sound_path = tone_bank.ALARM_SOUND_PATH
         
         if sound_path:
             pygame.mixer.init()
             pygame.mixer.music.load(sound_path)
             pygame.mixer.music.play(-1)  # Loop indefinitely
-            st.session_state.alarm_sound_playing = True
-            st.session_state.active_alarm_sound = "music"
+            sess.alarm_sound_playing = True
+            sess.active_alarm_sound = "music"
             return True
         else:
             # Create a simple beep sound using pygame if no file found
             try:
                 pygame.mixer.init()
-                sample_rate = 44100
-                duration = 1000  # milliseconds
-                frequency = 880  # Hz
-                
-                n_samples = int(round(duration * 0.001 * sample_rate))
-                buf = np.zeros((n_samples, 2), dtype=np.int16)
-                max_sample = 2**(16 - 1) - 1
-                
-                for i in range(n_samples):
-                    t = float(i) / sample_rate
-                    buf[i][0] = int(round(max_sample * math.sin(2 * math.pi * frequency * t)))
-                    buf[i][1] = int(round(max_sample * math.sin(2 * math.pi * frequency * t)))
-                
-                sound = pygame.sndarray.make_sound(buf)
+                sound = tone_bank.get_tone(880, 1000)  # Hz, milliseconds
                 sound.play(-1)  # Loop the sound
-                st.session_state.alarm_sound_playing = True
-                st.session_state.active_alarm_sound = sound
+                sess.alarm_sound_playing = True
+                sess.active_alarm_sound = sound
                 return True
             except Exception as e:
                 print(f"Error generating beep: {e}")
                 # Fallback to JavaScript audio
                 play_alarm_sound_js()
-                st.session_state.alarm_sound_playing = True
-                st.session_state.active_alarm_sound = "js"
+                sess.alarm_sound_playing = True
+                sess.active_alarm_sound = "js"
                 return True
     except Exception as e:
         print(f"Error playing alarm: {e}")
         # Final fallback to JavaScript
         play_alarm_sound_js()
-        st.session_state.alarm_sound_playing = True
-        st.session_state.active_alarm_sound = "js"
+        sess.alarm_sound_playing = True
+        sess.active_alarm_sound = "js"
         return False
 
 def play_alarm_sound_js():
@@ -808,14 +677,14 @@ def stop_alarm():
     """Stop alarm sound - FIXED to work properly"""
     try:
         # Stop pygame music if playing
-        if st.session_state.active_alarm_sound == "music":
+        if sess.active_alarm_sound == "music":
             pygame.mixer.music.stop()
         # Stop pygame sound if playing
-        elif hasattr(st.session_state.active_alarm_sound, 'stop'):
-            st.session_state.active_alarm_sound.stop()
+        elif hasattr(sess.active_alarm_sound, 'stop'):
+            sess.active_alarm_sound.stop()
         
-        st.session_state.alarm_sound_playing = False
-        st.session_state.active_alarm_sound = None
+        sess.alarm_sound_playing = False
+        sess.active_alarm_sound = None
         return True
     except Exception as e:
         print(f"Error stopping alarm: {e}")
@@ -825,8 +694,8 @@ def stop_alarm():
             pygame.mixer.stop()
         except:
             pass
-        st.session_state.alarm_sound_playing = False
-        st.session_state.active_alarm_sound = None
+        sess.alarm_sound_playing = False
+        sess.active_alarm_sound = None
         return False
 
 def test_alarm():
@@ -834,19 +703,7 @@ def test_alarm():
     try:
         show_alarm_notification("🔊 Testing alarm sound...")
         
-        sound_files = [
-            "alarm.mp3", 
-            "alarm.wav", 
-            "alarm_sound.mp3", 
-            "beep.mp3",
-            "./alarm.mp3"
-        ]
-        sound_path = None
-        
-        for file in sound_files:
-            if os.path.exists(file):
-                sound_path = file
-                break
+        sound_path = tone_bank.ALARM_SOUND_PATH
         
         if sound_path:
             pygame.mixer.init()
@@ -856,20 +713,7 @@ def test_alarm():
         else:
             # Use pygame to generate beep
             pygame.mixer.init()
-            sample_rate = 44100
-            duration = 500  # milliseconds
-            frequency = 660  # Hz
-            
-            n_samples = int(round(duration * 0.001 * sample_rate))
-            buf = np.zeros((n_samples, 2), dtype=np.int16)
-            max_sample = 2**(16 - 1) - 1
-            
-            for i in range(n_samples):
-                t = float(i) / sample_rate
-                buf[i][0] = int(round(max_sample * math.sin(2 * math.pi * frequency * t)))
-                buf[i][1] = int(round(max_sample * math.sin(2 * math.pi * frequency * t)))
-            
-            sound = pygame.sndarray.make_sound(buf)
+            sound = tone_bank.get_tone(660, 500)  # Hz, milliseconds
             sound.play()
             show_alarm_popup("🔊 Playing generated beep sound (no alarm file found)", "info")
     except Exception as e:
@@ -877,68 +721,70 @@ def test_alarm():
         play_alarm_sound_js()
 
 # ---------- File Utilities ----------
-def save_json(file_path, data):
-    try:
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=2)
-        return True
-    except Exception as e:
-        print(f"Error saving {file_path}: {e}")
-        return False
-
-def load_json(file_path):
-    try:
-        if os.path.exists(file_path):
-            with open(file_path, "r") as f:
-                return json.load(f)
-        return {}
-    except Exception as e:
-        print(f"Error loading {file_path}: {e}")
-        return {}
-
 # -------------------------------
 # ENHANCED ALARM MONITORING SYSTEM WITH EDITABLE TIMES
 # -------------------------------
-def monitor_alarms_background():
-    """Background thread to monitor and trigger alarms"""
-    while True:
-        try:
-            if st.session_state.user:
-                check_alarms()
-            time.sleep(30)  # Check every 30 seconds
-        except Exception as e:
-            print(f"Error in alarm monitor: {e}")
-            time.sleep(30)
+def get_alarm_scheduler():
+    """Return the process-wide alarm scheduler, up to date with alarm_settings.json"""
+    # Habit reminders are scheduled only by the API's reminder engine
+    return alarm_scheduler.get_scheduler(alarm_settings_store)
 
-def check_alarms():
-    """Enhanced alarm checking with better timing"""
-    now = datetime.now()
-    
-    # Only check alarms once per minute to reduce overhead
-    if (st.session_state.last_alarm_check_time and 
-        (now - st.session_state.last_alarm_check_time).total_seconds() < 55):
+def reschedule_alarms():
+    """Recompute the weekly alarm after its settings change"""
+    get_alarm_scheduler().refresh()
+
+# Server reminder events older than this are listed in history but not rung
+REMINDER_EVENT_MAX_AGE = 300
+
+# app.py runs afresh on every rerun, so this limits polling to once per rerun
+_reminder_events_polled = False
+
+def fetch_server_reminder_events():
+    """Fired reminders recorded by the API's reminder engine, as scheduler events"""
+    global _reminder_events_polled
+    if not sess.user or _reminder_events_polled:
         return []
-    
-    st.session_state.last_alarm_check_time = now
-    current_time = now.strftime("%H:%M")
-    current_day = calendar.day_name[now.weekday()]
-    
+    _reminder_events_polled = True
+    data = reminder_events_api(sess.user["user_id"])
+    events = []
+    for e in data.get("events", []) if data.get("success") else []:
+        fired_at = datetime.fromisoformat(e["fired_at"])
+        events.append({
+            "key": e["habit_name"],
+            "type": "habit_reminder",
+            "alarm_time": datetime.strptime(e["alarm_time"], "%H:%M").time(),
+            "days": e.get("days", []),
+            "fire_at": fired_at,
+            "triggered_at": fired_at
+        })
+    return events
+
+def check_alarms():
+    """Handle the weekly alarm and the server's habit reminders fired since the last render"""
     triggered = []
+    fired, sess.alarm_fired_seq = get_alarm_scheduler().fired_since(sess.alarm_fired_seq)
+    fired += fetch_server_reminder_events()
     
-    # Check habit alarms
-    for habit_name, alarm in list(st.session_state.alarms.items()):
-        alarm_time = alarm["alarm_time"].strftime("%H:%M")
-        alarm_days = alarm.get("days", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
+    for event in fired:
+        key = event["key"]
+        now = event["triggered_at"]
         
-        # Check if it's the right day and time
-        if current_day in alarm_days and current_time == alarm_time:
-            # Check cooldown to prevent multiple triggers in the same minute
-            last_trigger = st.session_state.last_alarm_trigger.get(habit_name)
-            if last_trigger and (now - last_trigger).total_seconds() < 55:  # 55 second cooldown
+        if event["type"] == "habit_reminder":
+            habit_name = key
+            
+            # Record in history
+            sess.alarm_history.append({
+                "habit_name": habit_name,
+                "alarm_time": event["alarm_time"],
+                "triggered_at": now,
+                "days": event["days"],
+                "type": "habit_reminder"
+            })
+            
+            # Reminders that fired while no page was open are not rung late
+            if (datetime.now() - now).total_seconds() > REMINDER_EVENT_MAX_AGE:
                 continue
-                
             triggered.append(habit_name)
-            st.session_state.last_alarm_trigger[habit_name] = now
             
             # Enhanced notification with popup and toast
             popup_message = f"🔔 Habit Reminder!\n\n{habit_name} - Time to work on your habit! ⏰"
@@ -950,32 +796,10 @@ def check_alarms():
                 play_alarm()
             except Exception as e:
                 print(f"Error playing habit alarm: {e}")
-            
-            # Record in history
-            st.session_state.alarm_history.append({
-                "habit_name": habit_name,
-                "alarm_time": alarm["alarm_time"],
-                "triggered_at": now,
-                "days": alarm_days,
-                "type": "habit_reminder"
-            })
-    
-    # Check weekly alarms
-    alarm_settings = load_json(ALARM_FILE)
-    if alarm_settings and alarm_settings.get("enabled", True):
-        alarm_time_str = alarm_settings.get("time", "")
-        alarm_days = alarm_settings.get("days", [])
-        
-        if current_day in alarm_days and current_time == alarm_time_str:
-            # Check cooldown for weekly alarm
-            last_weekly_trigger = st.session_state.last_alarm_trigger.get("weekly_alarm")
-            if last_weekly_trigger and (now - last_weekly_trigger).total_seconds() < 55:
-                return triggered
-                
-            st.session_state.last_alarm_trigger["weekly_alarm"] = now
-            
+        else:
+            current_day = calendar.day_name[event["fire_at"].weekday()]
             quote = random.choice(MOTIVATIONAL_QUOTES)
-            habits_data = load_json(HABITS_FILE) or {}
+            habits_data = habit_data_store.load() or {}
             todays_habits = habits_data.get(current_day, [])
             
             # Create notification
@@ -995,84 +819,125 @@ def check_alarms():
     
     return triggered
 
+def sync_reminder(alarm):
+    """Push one alarm to the server reminder engine; True if it was stored"""
+    result = set_reminder_api(sess.user["user_id"], alarm.key, alarm.time, alarm.days)
+    if not result.get("success"):
+        print(f"Reminder sync failed for {alarm.key}: {result.get('error')}")
+        return False
+    return True
+
+def backfill_server_reminders():
+    """Make the server's reminders match the alarms saved locally (run at login)"""
+    data = list_reminders_api(sess.user["user_id"])
+    if not data.get("success"):
+        print(f"Could not list server reminders: {data.get('error')}")
+        return
+    on_server = {
+        r["habit_name"]: (r["alarm_time"][:5], sorted(r.get("days") or []), r.get("enabled", True))
+        for r in data.get("reminders", [])
+    }
+    for name, alarm in sess.alarms.items():
+        if alarm.enabled and on_server.get(name) != (alarm.hhmm, sorted(alarm.days), True):
+            sync_reminder(alarm)
+
 def set_alarm(habit_name, alarm_time, days=None):
     """Enhanced alarm setting with validation"""
-    if days is None:
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    
-    st.session_state.alarms[habit_name] = {
-        "habit_name": habit_name,
-        "alarm_time": alarm_time,
-        "triggered": False,
-        "recurring": True,
-        "days": days,
-        "created_at": datetime.now().isoformat()
-    }
-    
-    # Save alarms to persistent database
-    if st.session_state.user:
-        save_alarms_to_db(st.session_state.user["user_id"], st.session_state.alarms)
-    
-    days_display = ", ".join(days) if days else "daily"
-    show_alarm_popup(f"🔔 Alarm set for {habit_name} at {alarm_time.strftime('%I:%M %p')} on {days_display}!", "success")
+    alarm = alarm_scheduler.Alarm.from_time(habit_name, alarm_time, days)
+    sess.alarms[habit_name] = alarm
+    
+    # Save the alarm to persistent storage and the server reminder engine
+    if sess.user:
+        alarm_store.upsert_alarm(sess.user["user_id"], alarm)
+        if not sync_reminder(alarm):
+            show_alarm_popup(f"⚠️ Alarm for {habit_name} saved, but the reminder server could not be reached. It will sync at your next login.", "warning")
+            return alarm_time
+    
+    days_display = ", ".join(alarm.days) if alarm.days else "daily"
+    show_alarm_popup(f"🔔 Alarm set for {habit_name} at {alarm.label} on {days_display}!", "success")
     show_alarm_notification(f"Alarm set for {habit_name}")
     return alarm_time
 
 def update_alarm_time(habit_name, new_alarm_time, new_days=None):
     """Update existing alarm time and days"""
-    if habit_name in st.session_state.alarms:
-        st.session_state.alarms[habit_name]["alarm_time"] = new_alarm_time
-        if new_days:
-            st.session_state.alarms[habit_name]["days"] = new_days
-        
-        # Save updated alarms to persistent database
-        if st.session_state.user:
-            save_alarms_to_db(st.session_state.user["user_id"], st.session_state.alarms)
+    if habit_name in sess.alarms:
+        current = sess.alarms[habit_name]
+        alarm = alarm_scheduler.Alarm.from_time(habit_name, new_alarm_time, new_days or current.days,
+                                                enabled=current.enabled)
+        sess.alarms[habit_name] = alarm
+        
+        # Save the updated alarm to persistent storage and the server reminder engine
+        if sess.user:
+            alarm_store.upsert_alarm(sess.user["user_id"], alarm)
+            if not sync_reminder(alarm):
+                show_alarm_popup(f"⚠️ Alarm for {habit_name} updated, but the reminder server could not be reached. It will sync at your next login.", "warning")
+                return True
         
-        days_display = ", ".join(new_days) if new_days else ", ".join(st.session_state.alarms[habit_name]["days"])
-        show_alarm_popup(f"🔔 Alarm updated for {habit_name} at {new_alarm_time.strftime('%I:%M %p')} on {days_display}!", "success")
+        days_display = ", ".join(alarm.days)
+        show_alarm_popup(f"🔔 Alarm updated for {habit_name} at {alarm.label} on {days_display}!", "success")
         show_alarm_notification(f"Alarm updated for {habit_name}")
         return True
     return False
 
 def remove_alarm(habit_name):
     """Remove an alarm and save changes to database"""
-    if habit_name in st.session_state.alarms:
-        del st.session_state.alarms[habit_name]
-        # Update persistent storage
-        if st.session_state.user:
-            save_alarms_to_db(st.session_state.user["user_id"], st.session_state.alarms)
+    if habit_name in sess.alarms:
+        del sess.alarms[habit_name]
+        # Update persistent storage and the server reminder engine
+        if sess.user:
+            alarm_store.delete_alarm(sess.user["user_id"], habit_name)
+            result = remove_reminder_api(sess.user["user_id"], habit_name)
+            if not result.get("success"):
+                print(f"Reminder removal failed for {habit_name}: {result.get('error')}")
+                show_alarm_popup(f"⚠️ Alarm for {habit_name} removed here, but the reminder server could not be reached.", "warning")
+                st.rerun()
         show_alarm_popup(f"Alarm for {habit_name} removed!", "success")
         st.rerun()
 
 def load_user_alarms():
     """Load alarms for the current user from persistent storage"""
-    if st.session_state.user:
-        user_id = st.session_state.user["user_id"]
+    if sess.user:
+        user_id = sess.user["user_id"]
         # Load from database instead of session state
-        alarms_from_db = load_alarms_from_db(user_id)
-        st.session_state.alarms = alarms_from_db
+        try:
+            sess.alarms = alarm_store.load_alarms(user_id)
+        except Exception as e:
+            print(f"Error loading alarms from DB: {e}")
+            sess.alarms = {}
 
 # -------------------------------
 # AUTO-REFRESH MECHANISM
 # -------------------------------
 def setup_auto_refresh():
-    """Set up automatic refresh to check alarms"""
-    # This creates a simple auto-refresh mechanism
-    st.markdown("""
-    <script>
-    // Auto-refresh the page every 60 seconds to check alarms
-    setTimeout(function() {
-        window.location.reload();
-    }, 60000);
-    </script>
-    """, unsafe_allow_html=True)
+    """Schedule a single refresh for when the next alarm is due"""
+    delays = []
+    # Habit reminders fire on the server; refresh just after the next one
+    # so this rerun's poll of /reminders/events picks it up
+    fire_times = [t for t in (get_alarm_scheduler().next_fire_at(),
+                              alarm_scheduler.next_fire_time(sess.alarms.values())) if t]
+    next_fire = min(fire_times) if fire_times else None
+    if next_fire:
+        delays.append(max(1, (next_fire - datetime.now()).total_seconds() + 2))
+    if sess.active_timers:
+        delays.append(60)  # keep running timers ticking
+    
+    if delays:
+        delay_ms = int(min(delays) * 1000)
+        st.markdown(f"""
+        <script>
+        // Refresh once, when the next alarm fires
+        setTimeout(function() {{
+            window.location.reload();
+        }}, {delay_ms});
+        </script>
+        """, unsafe_allow_html=True)
     
     # Show auto-refresh info
-    st.sidebar.markdown("""
+    next_text = next_fire.strftime('%a %I:%M %p') if next_fire else "none"
+    st.sidebar.markdown(f"""
     <div class="auto-refresh-info">
-        🔄 Auto-refresh: 60s<br>
-        🔔 Alarms work when tab is open
+        🔔 Next reminder: {next_text}<br>
+        🔔 Reminders are scheduled on the server
     </div>
     """, unsafe_allow_html=True)
 
@@ -1080,34 +945,16 @@ def setup_auto_refresh():
 # TIMER FUNCTIONS
 # -------------------------------
 def start_timer(habit_name, habit_id, target_minutes=25):
-    st.session_state.active_timers[habit_id] = {
-        "habit_name": habit_name,
-        "start_time": datetime.now(),
-        "habit_id": habit_id,
-        "target_minutes": target_minutes
-    }
+    sess.active_timers[habit_id] = habit_session.TimerEntry(habit_id, habit_name, datetime.now(), target_minutes)
 
 def stop_timer(habit_id):
-    if habit_id in st.session_state.active_timers:
-        timer_data = st.session_state.active_timers[habit_id]
-        end_time = datetime.now()
-        duration = end_time - timer_data["start_time"]
-        
-        # Save to timer history
-        st.session_state.timer_history.append({
-            "habit_name": timer_data["habit_name"],
-            "habit_id": habit_id,
-            "start_time": timer_data["start_time"],
-            "end_time": end_time,
-            "duration": duration,
-            "date": datetime.now().date(),
-            "target_minutes": timer_data.get("target_minutes", 25)
-        })
+    if habit_id in sess.active_timers:
+        # Move the finished timer to the history
+        timer = sess.active_timers.pop(habit_id)
+        timer.end_time = datetime.now()
+        sess.timer_history.append(timer)
         
-        # Remove from active timers
-        del st.session_state.active_timers[habit_id]
-        
-        return duration
+        return timer.duration
     return None
 
 def play_completion_sound():
@@ -1152,10 +999,10 @@ def format_time(seconds):
 # -------------------------------
 def calculate_weekly_stars():
     """Enhanced stars calculation with better accuracy"""
-    if not st.session_state.user:
+    if not sess.user:
         return 0
     
-    weekly_data = weekly_perf_api(st.session_state.user["user_id"])
+    weekly_data = weekly_perf_api(sess.user["user_id"])
     if weekly_data.get("success") and weekly_data.get("total_habits", 0) > 0:
         completion_pct = weekly_data.get("completion_pct", 0)
         
@@ -1193,7 +1040,7 @@ def load_user_data(user_id):
     """Load user-specific data for charts and reports"""
     try:
         # Calculate weekly stars
-        st.session_state.weekly_stars = calculate_weekly_stars()
+        sess.weekly_stars = calculate_weekly_stars()
         # Load user's persistent alarms from database
         load_user_alarms()
         
@@ -1202,7 +1049,7 @@ def load_user_data(user_id):
 
 def get_today_habit_distribution():
     """Get today's habit distribution for pie chart"""
-    today_habits = st.session_state.today_habits
+    today_habits = sess.today_habits
     if not today_habits:
         return {"Completed": 0, "Pending": 0}
     
@@ -1214,96 +1061,18 @@ def get_today_habit_distribution():
         "Pending": pending
     }
 
-def create_gradient_colors(base_color, num_colors):
-    """Create gradient colors from a base color"""
-    colors = []
-    for i in range(num_colors):
-        # Create lighter shades
-        factor = 0.8 + (i * 0.2) / num_colors
-        r = min(255, int(int(base_color[1:3], 16) * factor))
-        g = min(255, int(int(base_color[3:5], 16) * factor))
-        b = min(255, int(int(base_color[5:7], 16) * factor))
-        colors.append(f'#{r:02x}{g:02x}{b:02x}')
-    return colors
-
 def create_today_pie_chart(today_distribution):
-    """Create pie chart for today's habit distribution with BEAUTIFUL GRADIENT COLORS"""
+    """Pie chart PNG for today's habit distribution, cached by (completed, pending)"""
     if not today_distribution or (today_distribution["Completed"] == 0 and today_distribution["Pending"] == 0):
         return None
-    
-    labels = ['Completed', 'Pending']
-    sizes = [today_distribution["Completed"], today_distribution["Pending"]]
-    
-    # Create beautiful gradient colors
-    completed_gradient = create_gradient_colors('#8A2BE2', 3)  # Violet gradient
-    pending_gradient = create_gradient_colors('#FF8E53', 3)    # Orange gradient
-    
-    # Use the middle shade from each gradient
-    colors = [completed_gradient[1], pending_gradient[1]]
-    
-    fig, ax = plt.subplots(figsize=(6, 6))
-    
-    # Create the pie chart with gradient colors
-    wedges, texts, autotexts = ax.pie(
-        sizes, 
-        labels=labels,
-        autopct='%1.1f%%',
-        colors=colors,
-        startangle=90,
-        textprops={'fontsize': 12, 'weight': 'bold', 'color': 'white'},
-        wedgeprops={'edgecolor': 'white', 'linewidth': 2, 'antialiased': True}
-    )
-    
-    # Style the chart to perfectly match app theme
-    plt.setp(autotexts, size=12, weight="bold", color="white")
-    plt.setp(texts, size=12, color="white", weight="bold")
-    ax.set_title("Today's Habit Completion", fontsize=14, fontweight='bold', color='white', pad=20)
-    
-    # Set background to match app exactly
-    ax.set_facecolor('#0a0e27')
-    fig.patch.set_facecolor('#0a0e27')
-    
-    # Add subtle shadow effect to wedges
-    for wedge in wedges:
-        wedge.set_linewidth(2)
-        wedge.set_edgecolor('#FFFFFF')
-    
-    return fig
+    return charts.today_pie_chart_png(today_distribution["Completed"], today_distribution["Pending"])
 
 def create_weekly_chart(weekly_data):
-    """Create weekly progress chart"""
+    """Weekly progress chart PNG, cached by the daily breakdown"""
     if not weekly_data or not weekly_data.get('daily_breakdown'):
         return None
-    
-    daily_data = weekly_data['daily_breakdown']
-    days = [entry['day_name'][:3] for entry in daily_data]
-    completion_rates = [entry['completion_rate'] for entry in daily_data]
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Create gradient bars
-    colors = create_gradient_colors('#8A2BE2', len(days))
-    
-    bars = ax.bar(days, completion_rates, color=colors, edgecolor='white', linewidth=2)
-    
-    # Add value labels on bars
-    for bar, value in zip(bars, completion_rates):
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height + 1,
-                f'{value:.0f}%', ha='center', va='bottom', 
-                fontweight='bold', color='white', fontsize=10)
-    
-    ax.set_ylabel('Completion Rate (%)', color='white', fontweight='bold')
-    ax.set_ylim(0, 100)
-    ax.set_title('Weekly Progress Overview', color='white', fontweight='bold', pad=20)
-    
-    # Style the chart
-    ax.set_facecolor('#0a0e27')
-    fig.patch.set_facecolor('#0a0e27')
-    ax.tick_params(colors='white', labelsize=10)
-    ax.grid(True, alpha=0.3, color='white')
-    
-    return fig
+    breakdown = tuple((entry['day_name'], entry['completion_rate']) for entry in weekly_data['daily_breakdown'])
+    return charts.weekly_chart_png(breakdown)
 
 # -------------------------------
 # AUTH PAGE
@@ -1324,18 +1093,18 @@ def auth_page():
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🔐 Sign In", use_container_width=True, 
-                    type="primary" if st.session_state.auth_mode == "login" else "secondary"):
-            st.session_state.auth_mode = "login"
+                    type="primary" if sess.auth_mode == "login" else "secondary"):
+            sess.auth_mode = "login"
             st.rerun()
     with col2:
         if st.button("🚀 Register", use_container_width=True,
-                    type="primary" if st.session_state.auth_mode == "register" else "secondary"):
-            st.session_state.auth_mode = "register"
+                    type="primary" if sess.auth_mode == "register" else "secondary"):
+            sess.auth_mode = "register"
             st.rerun()
     
     st.markdown("<div style='margin: 2rem 0;'></div>", unsafe_allow_html=True)
     
-    if st.session_state.auth_mode == "login":
+    if sess.auth_mode == "login":
         st.markdown("### Welcome Back")
         email = st.text_input("Email", placeholder="Enter your email")
         password = st.text_input("Password", type="password", placeholder="Enter your password")
@@ -1344,15 +1113,18 @@ def auth_page():
             if email and password:
                 result = login_api(email, password)
                 if result.get("success"):
-                    st.session_state.user = {
+                    sess.user = {
                         "user_id": result["user_id"],
                         "name": result["name"],
-                        "email": email
+                        "email": email,
+                        "token": result.get("token")
                     }
                     # Initialize daily habits and load user data
                     initialize_daily_habits()
                     load_user_data(result["user_id"])
-                    st.session_state.page = "home"
+                    # Once per login, not on every load_user_data after a habit change
+                    backfill_server_reminders()
+                    sess.page = "home"
                     st.success("Welcome back! 🎉")
                     time.sleep(1)
                     st.rerun()
@@ -1371,12 +1143,13 @@ def auth_page():
             if name and email and password:
                 result = register_api(name, email, password)
                 if result.get("success"):
-                    st.session_state.user = {
+                    sess.user = {
                         "user_id": result["user_id"],
                         "name": result["name"],
-                        "email": email
+                        "email": email,
+                        "token": result.get("token")
                     }
-                    st.session_state.page = "home"
+                    sess.page = "home"
                     st.success("Welcome! 🎉")
                     time.sleep(1)
                     st.rerun()
@@ -1395,7 +1168,7 @@ def home_page():
     initialize_daily_habits()
     
     # Set current page for unique button keys
-    st.session_state.current_page = "home"
+    sess.current_page = "home"
     
     # Check alarms on every page load - this will show popups on any page
     triggered_alarms = check_alarms()
@@ -1404,7 +1177,7 @@ def home_page():
     render_alarm_popup()
     
     # Add stop alarm button in the main interface
-    if st.session_state.alarm_sound_playing:
+    if sess.alarm_sound_playing:
         st.markdown('<div class="cartoon-card alarm-active">', unsafe_allow_html=True)
         st.warning("🔔 Alarm is currently playing!")
         if st.button("🛑 Stop Alarm", key="stop_alarm_main", use_container_width=True, type="primary"):
@@ -1431,7 +1204,7 @@ def home_page():
     <div class="fade-in">
         <div style="text-align:center; padding:1.5rem;">
             <h1 class="main-header">
-                {greeting}, {st.session_state.user['name'] if st.session_state.user else 'User'}!
+                {greeting}, {sess.user['name'] if sess.user else 'User'}!
             </h1>
         </div>
         <div style="background: linear-gradient(180deg, rgba(138, 43, 226, 0.28), rgba(147, 112, 219, 0.14)); border-radius: 14px; padding: 0.6rem; text-align: center; color: #ffffff; font-weight: 600; font-size: 0.95rem; margin: 0.75rem 0 1rem 0; border: 1px solid rgba(255,255,255,0.18); backdrop-filter: blur(8px);">
@@ -1444,16 +1217,16 @@ def home_page():
 
     # Show fresh start message if it's a new day
     today = datetime.now().date()
-    if st.session_state.last_reset_date == today:
+    if sess.last_reset_date == today:
         st.success("✨ **Fresh Start!** Today is a new day. Previous habits are cleared. Add new habits to begin! ✨")
 
     # Get today's status - ONLY TODAY'S HABITS
-    if st.session_state.user:
-        today_data = today_status_api(st.session_state.user["user_id"])
+    if sess.user:
+        today_data = get_today_status(sess.user["user_id"])
         
         if today_data.get("success"):
-            total_habits = len(st.session_state.today_habits)
-            completed_habits = len(st.session_state.completed_habits)
+            total_habits = len(sess.today_habits)
+            completed_habits = len(sess.completed_habits)
             
             if total_habits > 0:
                 cols = st.columns(3)
@@ -1494,9 +1267,9 @@ def home_page():
                 today_distribution = get_today_habit_distribution()
                 if today_distribution["Completed"] > 0 or today_distribution["Pending"] > 0:
                     st.markdown("### 📊 Today's Progress Chart")
-                    fig = create_today_pie_chart(today_distribution)
-                    if fig:
-                        st.pyplot(fig)
+                    chart = create_today_pie_chart(today_distribution)
+                    if chart:
+                        st.image(chart)
             else:
                 st.info("🌟 Add your first habit to start your daily journey!")
         else:
@@ -1510,7 +1283,7 @@ def create_habit_page():
     initialize_daily_habits()
     
     # Set current page for unique button keys
-    st.session_state.current_page = "create_habit"
+    sess.current_page = "create_habit"
     
     # Check alarms on every page load - this will show popups on any page
     triggered_alarms = check_alarms()
@@ -1519,7 +1292,7 @@ def create_habit_page():
     render_alarm_popup()
     
     # Add stop alarm button
-    if st.session_state.alarm_sound_playing:
+    if sess.alarm_sound_playing:
         st.markdown('<div class="cartoon-card alarm-active">', unsafe_allow_html=True)
         st.warning("🔔 Alarm is currently playing!")
         if st.button("🛑 Stop Alarm", key="stop_alarm_create", use_container_width=True, type="primary"):
@@ -1566,9 +1339,9 @@ def create_habit_page():
                 st.info(f"Reminder will activate at {alarm_time.strftime('%I:%M %p')} on selected days for '{habit_name}'")
         
         if st.button("Create Habit", use_container_width=True, type="primary"):
-            if habit_name.strip() and st.session_state.user:
+            if habit_name.strip() and sess.user:
                 # Use the API to add habit to database - ONLY FOR TODAY
-                result = add_habit_api(habit_name, habit_description, st.session_state.user["user_id"], target_minutes)
+                result = add_habit_api(habit_name, habit_description, sess.user["user_id"], target_minutes)
                 if result.get("success"):
                     # Set alarm if requested
                     if use_alarm and alarm_time and habit_name and selected_days:
@@ -1578,7 +1351,7 @@ def create_habit_page():
                     show_alarm_notification(f"New habit '{habit_name}' created!")
                     
                     # Reload user data and refresh today's habits
-                    load_user_data(st.session_state.user["user_id"])
+                    load_user_data(sess.user["user_id"])
                     load_fresh_habits()
                     time.sleep(1)
                     st.rerun()
@@ -1597,7 +1370,7 @@ def my_habits_page():
     initialize_daily_habits()
     
     # Set current page for unique button keys
-    st.session_state.current_page = "my_habits"
+    sess.current_page = "my_habits"
     
     # Check alarms on every page load - this will show popups on any page
     triggered_alarms = check_alarms()
@@ -1606,7 +1379,7 @@ def my_habits_page():
     render_alarm_popup()
     
     # Add stop alarm button
-    if st.session_state.alarm_sound_playing:
+    if sess.alarm_sound_playing:
         st.markdown('<div class="cartoon-card alarm-active">', unsafe_allow_html=True)
         st.warning("🔔 Alarm is currently playing!")
         if st.button("🛑 Stop Alarm", key="stop_alarm_habits", use_container_width=True, type="primary"):
@@ -1621,24 +1394,56 @@ def my_habits_page():
     
     # Show fresh start message
     today = datetime.now().date()
-    if st.session_state.last_reset_date == today:
+    if sess.last_reset_date == today:
         st.success("✨ **Fresh Start!** Today is a new day. Your habits from previous days are cleared. ✨")
     
     # Only show habits for the current logged-in user - ONLY TODAY'S HABITS
-    habits = st.session_state.today_habits
+    habits = sess.today_habits
     if not habits:
         st.info("No habits for today. Add some habits to get started! 🌟")
         return
     
+    # Auto-complete every habit whose timer reached its target in one call
+    now = datetime.now()
+    finished = [
+        habit for habit in habits
+        if not habit.get("completed") and habit["habit_id"] in sess.active_timers
+        and (now - sess.active_timers[habit["habit_id"]].start_time).total_seconds()
+            >= habit.get('target_minutes', 25) * 60
+    ]
+    if finished:
+        complete_habits_api([habit["habit_id"] for habit in finished], sess.user["user_id"])
+        names = ", ".join(f"'{habit['name']}'" for habit in finished)
+        show_alarm_popup("🎉 Target time reached! Habit completed!", "success")
+        show_alarm_notification(f"{names} completed! 🎉")
+        play_completion_sound()
+        load_fresh_habits()
+        st.rerun()
+    
+    pending_ids = [
+        habit["habit_id"] for habit in habits
+        if not habit.get("completed") and habit["habit_id"] not in sess.deleted_habits
+    ]
+    if len(pending_ids) > 1:
+        if st.button("✅ Complete All", key="complete_all_habits", use_container_width=True):
+            complete_habits_api(pending_ids, sess.user["user_id"])
+            play_completion_sound()
+            show_alarm_notification(f"{len(pending_ids)} habits completed! 🎉")
+            load_fresh_habits()
+            load_user_data(sess.user["user_id"])
+            show_alarm_popup("All habits completed! 🎉", "success")
+            time.sleep(1)
+            st.rerun()
+    
     for habit in habits:
-        if habit["habit_id"] in st.session_state.deleted_habits:
+        if habit["habit_id"] in sess.deleted_habits:
             continue
             
         completed = habit.get("completed", False)
-        timer_active = habit["habit_id"] in st.session_state.active_timers
+        timer_active = habit["habit_id"] in sess.active_timers
         
         # Check if alarm is set for this habit
-        has_alarm = habit["name"] in st.session_state.alarms
+        has_alarm = habit["name"] in sess.alarms
         
         bubble_class = "habit-bubble habit-completed" if completed else "habit-bubble"
         if timer_active:
@@ -1665,31 +1470,19 @@ def my_habits_page():
             if completed:
                 st.write("✅ **Completed**")
             if timer_active:
-                timer_data = st.session_state.active_timers[habit["habit_id"]]
-                elapsed = datetime.now() - timer_data["start_time"]
+                elapsed = sess.active_timers[habit["habit_id"]].duration
                 target_seconds = target_minutes * 60
                 progress = min((elapsed.total_seconds() / target_seconds) * 100, 100)
                 
                 st.write(f"⏱️ **Timer:** {format_time(elapsed.total_seconds())}")
                 st.progress(progress/100)
-                
-                # Auto-complete if target time reached
-                if elapsed.total_seconds() >= target_seconds and not completed:
-                    show_alarm_popup("🎉 Target time reached! Habit completed!", "success")
-                    show_alarm_notification(f"'{habit['name']}' completed! 🎉")
-                    complete_habit_api(habit["habit_id"], st.session_state.user["user_id"])
-                    play_completion_sound()
-                    load_fresh_habits()
-                    st.rerun()
                     
             if has_alarm:
-                alarm_info = st.session_state.alarms[habit["name"]]
-                alarm_time = alarm_info["alarm_time"]
-                days = alarm_info.get("days", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
+                alarm = sess.alarms[habit["name"]]
                 
                 # Display days as pills
-                days_display = "".join([f'<span class="day-pill active">{day[:3]}</span>' for day in days])
-                st.write(f"🔔 **Reminder:** {alarm_time.strftime('%I:%M %p')}")
+                days_display = "".join([f'<span class="day-pill active">{day[:3]}</span>' for day in alarm.days])
+                st.write(f"🔔 **Reminder:** {alarm.label}")
                 st.markdown(f"**Days:** {days_display}", unsafe_allow_html=True)
         
         with col2:
@@ -1701,7 +1494,7 @@ def my_habits_page():
                             # Play completion sound when manually stopped
                             play_completion_sound()
                             # Auto-complete when timer stops
-                            complete_habit_api(habit["habit_id"], st.session_state.user["user_id"])
+                            complete_habit_api(habit["habit_id"], sess.user["user_id"])
                             show_alarm_notification(f"'{habit['name']}' completed! 🎉")
                             load_fresh_habits()
                         st.rerun()
@@ -1714,11 +1507,11 @@ def my_habits_page():
         with col3:
             if not completed and not timer_active:  # Only show complete button for incomplete habits
                 if st.button("Complete", key=f"comp_{habit['habit_id']}", use_container_width=True, type="primary"):
-                    complete_habit_api(habit["habit_id"], st.session_state.user["user_id"])
+                    complete_habit_api(habit["habit_id"], sess.user["user_id"])
                     play_completion_sound()
                     show_alarm_notification(f"'{habit['name']}' completed! 🎉")
                     load_fresh_habits()
-                    load_user_data(st.session_state.user["user_id"])
+                    load_user_data(sess.user["user_id"])
                     show_alarm_popup("Habit completed! 🎉", "success")
                     time.sleep(1)
                     st.rerun()
@@ -1726,7 +1519,7 @@ def my_habits_page():
         with col4:
             if not completed:  # Only show delete button for incomplete habits
                 if st.button("Delete", key=f"del_{habit['habit_id']}", use_container_width=True):
-                    remove_habit_api(habit["habit_id"], st.session_state.user["user_id"])
+                    remove_habit_api(habit["habit_id"], sess.user["user_id"])
                     show_alarm_popup("Habit deleted", "success")
                     show_alarm_notification(f"'{habit['name']}' deleted")
                     time.sleep(1)
@@ -1742,7 +1535,7 @@ def today_status_page():
     initialize_daily_habits()
     
     # Set current page for unique button keys
-    st.session_state.current_page = "today_status"
+    sess.current_page = "today_status"
     
     # Check alarms on every page load - this will show popups on any page
     triggered_alarms = check_alarms()
@@ -1751,7 +1544,7 @@ def today_status_page():
     render_alarm_popup()
     
     # Add stop alarm button
-    if st.session_state.alarm_sound_playing:
+    if sess.alarm_sound_playing:
         st.markdown('<div class="cartoon-card alarm-active">', unsafe_allow_html=True)
         st.warning("🔔 Alarm is currently playing!")
         if st.button("🛑 Stop Alarm", key="stop_alarm_status", use_container_width=True, type="primary"):
@@ -1775,7 +1568,7 @@ def today_status_page():
         st.markdown("### 📊 Today's Summary")
         
         # Use today's habits from session state (already filtered)
-        today_habits = st.session_state.today_habits
+        today_habits = sess.today_habits
         total_habits = len(today_habits)
         completed_habits = sum(1 for habit in today_habits if habit.get('completed', False))
         
@@ -1794,9 +1587,9 @@ def today_status_page():
             }
             
             st.markdown("#### Today's Distribution")
-            fig = create_today_pie_chart(today_distribution)
-            if fig:
-                st.pyplot(fig)
+            chart = create_today_pie_chart(today_distribution)
+            if chart:
+                st.image(chart)
         else:
             st.info("No habits for today. Add some habits to see your progress!")
         st.markdown('</div>', unsafe_allow_html=True)
@@ -1806,19 +1599,17 @@ def today_status_page():
         st.markdown("### 🔔 Reminder Management")
         
         # Active alarms
-        active_alarms = [name for name, alarm in st.session_state.alarms.items()]
+        active_alarms = [name for name, alarm in sess.alarms.items()]
         if active_alarms:
             st.markdown("#### 🔔 Active Reminders")
             for alarm_name in active_alarms:
-                alarm_data = st.session_state.alarms[alarm_name]
-                alarm_time = alarm_data["alarm_time"]
-                days = alarm_data.get("days", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
+                alarm = sess.alarms[alarm_name]
                 
                 # Display days as pills
-                days_display = "".join([f'<span class="day-pill active">{day[:3]}</span>' for day in days])
+                days_display = "".join([f'<span class="day-pill active">{day[:3]}</span>' for day in alarm.days])
                 
                 st.write(f"**{alarm_name}**")
-                st.write(f"🔔 {alarm_time.strftime('%I:%M %p')}")
+                st.write(f"🔔 {alarm.label}")
                 st.markdown(f"**Days:** {days_display}", unsafe_allow_html=True)
                 
                 # Add option to remove alarm
@@ -1829,8 +1620,8 @@ def today_status_page():
         
         # Alarm history
         st.markdown("#### 📋 Recent Reminders")
-        if st.session_state.alarm_history:
-            for alarm in st.session_state.alarm_history[-5:]:
+        if sess.alarm_history:
+            for alarm in list(sess.alarm_history)[-5:]:
                 st.write(f"**{alarm['habit_name']}** - {alarm['triggered_at'].strftime('%I:%M %p')}")
         else:
             st.info("No reminder history yet.")
@@ -1845,7 +1636,7 @@ def weekly_perf_page():
     initialize_daily_habits()
     
     # Set current page for unique button keys
-    st.session_state.current_page = "weekly_perf"
+    sess.current_page = "weekly_perf"
     
     # Check alarms on every page load - this will show popups on any page
     triggered_alarms = check_alarms()
@@ -1854,7 +1645,7 @@ def weekly_perf_page():
     render_alarm_popup()
     
     # Add stop alarm button
-    if st.session_state.alarm_sound_playing:
+    if sess.alarm_sound_playing:
         st.markdown('<div class="cartoon-card alarm-active">', unsafe_allow_html=True)
         st.warning("🔔 Alarm is currently playing!")
         if st.button("🛑 Stop Alarm", key="stop_alarm_weekly", use_container_width=True, type="primary"):
@@ -1868,8 +1659,8 @@ def weekly_perf_page():
     st.markdown("# Weekly Performance Report")
     
     # Get enhanced weekly data
-    if st.session_state.user:
-        weekly_data = weekly_perf_api(st.session_state.user["user_id"])
+    if sess.user:
+        weekly_data = weekly_perf_api(sess.user["user_id"])
         
         col1, col2 = st.columns(2)
         
@@ -1894,24 +1685,24 @@ def weekly_perf_page():
                 # Weekly progress chart
                 if daily_breakdown:
                     st.markdown("#### 📊 Daily Progress")
-                    fig = create_weekly_chart(weekly_data)
-                    if fig:
-                        st.pyplot(fig)
+                    chart = create_weekly_chart(weekly_data)
+                    if chart:
+                        st.image(chart)
                 
                 # Star rating display
                 st.markdown("### 🏆 Your Star Rating")
-                display_stars(st.session_state.weekly_stars)
+                display_stars(sess.weekly_stars)
                 
                 # Achievement messages
-                if st.session_state.weekly_stars == 5:
+                if sess.weekly_stars == 5:
                     st.success("🌟 **Habit Superstar!** You're amazing! Keep up the perfect work!")
-                elif st.session_state.weekly_stars == 4:
+                elif sess.weekly_stars == 4:
                     st.success("🎯 **Excellent Performer!** You're building strong habits consistently!")
-                elif st.session_state.weekly_stars == 3:
+                elif sess.weekly_stars == 3:
                     st.info("💪 **Solid Achiever!** You're making great progress!")
-                elif st.session_state.weekly_stars == 2:
+                elif sess.weekly_stars == 2:
                     st.info("📈 **Good Starter!** You're on the right track!")
-                elif st.session_state.weekly_stars == 1:
+                elif sess.weekly_stars == 1:
                     st.info("🌱 **Getting There!** Every habit counts!")
                 else:
                     st.info("🎯 **New Week, New Start!** Complete habits to earn stars!")
@@ -1945,7 +1736,7 @@ def weekly_perf_page():
             """)
             
             st.markdown("### 🎯 This Week's Goal")
-            current_stars = st.session_state.weekly_stars
+            current_stars = sess.weekly_stars
             if current_stars < 5:
                 next_threshold = [25, 50, 70, 85, 95][current_stars]
                 st.info(f"Aim for **{next_threshold}%** completion to reach **{current_stars + 1} stars** this week!")
@@ -1976,7 +1767,7 @@ def habit_reminder_system_page():
         st.markdown('<div class="cartoon-card">', unsafe_allow_html=True)
         
         # Load current settings
-        alarm_settings = load_json(ALARM_FILE)
+        alarm_settings = alarm_settings_store.load()
         
         if alarm_settings:
             try:
@@ -2015,7 +1806,8 @@ def habit_reminder_system_page():
                             "enabled": True,
                             "last_updated": datetime.now().isoformat()
                         }
-                        if save_json(ALARM_FILE, new_settings):
+                        if alarm_settings_store.save(new_settings):
+                            reschedule_alarms()
                             show_alarm_popup("✅ Reminder settings saved! You'll receive notifications on selected days.", "success")
                             show_alarm_notification("Weekly alarm settings saved!")
                         else:
@@ -2041,7 +1833,8 @@ def habit_reminder_system_page():
             if st.button("Disable Reminders", use_container_width=True):
                 if alarm_settings:
                     alarm_settings["enabled"] = False
-                    save_json(ALARM_FILE, alarm_settings)
+                    alarm_settings_store.save(alarm_settings)
+                    reschedule_alarms()
                 show_alarm_popup("Reminders disabled. Enable the checkbox above to activate weekly notifications.", "warning")
 
         st.markdown('</div>', unsafe_allow_html=True)
@@ -2051,7 +1844,7 @@ def habit_reminder_system_page():
         st.markdown('<div class="cartoon-card">', unsafe_allow_html=True)
         st.markdown("### 📅 Weekly Habit Planner")
         
-        habits = load_json(HABITS_FILE) or {}
+        habits = habit_data_store.load() or {}
         days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
         
         # Professional Grid Layout
@@ -2095,7 +1888,7 @@ def habit_reminder_system_page():
             if st.button("➕ Add Habit", use_container_width=True):
                 if new_habit.strip():
                     habits.setdefault(selected_day, []).append(new_habit.strip())
-                    if save_json(HABITS_FILE, habits):
+                    if habit_data_store.save(habits):
                         show_alarm_popup(f"✅ Added '{new_habit}' to {selected_day}", "success")
                         st.rerun()
                     else:
@@ -2134,7 +1927,7 @@ def habit_reminder_system_page():
                                 updated_habits.append(habit)
                     
                     habits[selected_day] = updated_habits
-                    if save_json(HABITS_FILE, habits):
+                    if habit_data_store.save(habits):
                         show_alarm_popup(f"✅ Removed '{habit_to_remove}' from {selected_day}", "success")
                         st.rerun()
                     else:
@@ -2145,7 +1938,7 @@ def habit_reminder_system_page():
             if st.button("🧹 Clear All for Day", use_container_width=True):
                 if selected_day in habits:
                     habits[selected_day] = []
-                    if save_json(HABITS_FILE, habits):
+                    if habit_data_store.save(habits):
                         show_alarm_popup(f"✅ Cleared all habits for {selected_day}", "success")
                         st.rerun()
                     else:
@@ -2173,34 +1966,29 @@ def habit_reminder_system_page():
 # -------------------------------
 def main():
     # Show auth page if not logged in
-    if st.session_state.user is None:
+    if sess.user is None:
         auth_page()
         return
     
     apply_cartoon_styles()
     
-    # Check alarms on every app run - this will show popups on any page
+    # Pick up alarms fired by the scheduler - this will show popups on any page
     triggered_alarms = check_alarms()
     
-    # Setup auto-refresh for alarm checking
+    # Refresh when the next alarm is due
     setup_auto_refresh()
     
-    # Start background alarm monitoring if not already started
-    if not st.session_state.alarm_thread_started:
-        threading.Thread(target=monitor_alarms_background, daemon=True).start()
-        st.session_state.alarm_thread_started = True
-    
     # Main app navigation for logged-in users
     st.sidebar.markdown(f"""
     <div class="cartoon-card" style="text-align:center;">
-        <h3>👋 Hello, {st.session_state.user['name']}!</h3>
-        <p>Weekly Stars: {st.session_state.weekly_stars}/5 ⭐</p>
+        <h3>👋 Hello, {sess.user['name']}!</h3>
+        <p>Weekly Stars: {sess.weekly_stars}/5 ⭐</p>
         <p>Fresh start every day! ✨</p>
     </div>
     """, unsafe_allow_html=True)
     
     # Add stop alarm button in sidebar if alarm is playing
-    if st.session_state.alarm_sound_playing:
+    if sess.alarm_sound_playing:
         st.sidebar.markdown("### 🔔 Alarm Active")
         if st.sidebar.button("🛑 Stop Alarm", key="stop_alarm_sidebar", use_container_width=True, type="primary"):
             if stop_alarm():
@@ -2210,35 +1998,40 @@ def main():
                 show_alarm_popup("Failed to stop alarm", "error")
     
     # Active timers in sidebar
-    if st.session_state.active_timers:
+    if sess.active_timers:
         st.sidebar.markdown("### ⏱️ Active Timers")
-        for habit_id, timer_data in st.session_state.active_timers.items():
-            elapsed = datetime.now() - timer_data["start_time"]
-            target_minutes = timer_data.get("target_minutes", 25)
+        for habit_id, timer in sess.active_timers.items():
+            elapsed = timer.duration
+            target_minutes = timer.target_minutes
             target_seconds = target_minutes * 60
             progress = min((elapsed.total_seconds() / target_seconds) * 100, 100)
             
             st.sidebar.info(
-                f"**{timer_data['habit_name']}**\n\n"
+                f"**{timer.habit_name}**\n\n"
                 f"{format_time(elapsed.total_seconds())}\n\n"
                 f"Progress: {progress:.1f}%"
             )
     
     # Active alarms in sidebar
-    active_alarms = [name for name, alarm in st.session_state.alarms.items()]
+    active_alarms = [name for name, alarm in sess.alarms.items()]
     if active_alarms:
         st.sidebar.markdown("### 🔔 Active Reminders")
         for alarm_name in active_alarms:
-            alarm_data = st.session_state.alarms[alarm_name]
-            alarm_time = alarm_data["alarm_time"]
-            days = alarm_data.get("days", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
-            days_short = ", ".join([day[:3] for day in days])
-            st.sidebar.warning(f"**{alarm_name}**\n{alarm_time.strftime('%I:%M %p')}\nDays: {days_short}")
+            alarm = sess.alarms[alarm_name]
+            days_short = ", ".join([day[:3] for day in alarm.days])
+            st.sidebar.warning(f"**{alarm_name}**\n{alarm.label}\nDays: {days_short}")
     
     # Add alarm status indicator
     current_time = datetime.now().strftime("%H:%M:%S")
     st.sidebar.markdown(f"*Last checked: {current_time}*")
     
+    # API call latency for this process
+    metrics = api_client.get_latency_metrics()
+    if metrics:
+        with st.sidebar.expander("📡 API latency"):
+            for path, m in sorted(metrics.items()):
+                st.caption(f"`{path}` · {m['count']} calls · avg {m['avg_ms']} ms · max {m['max_ms']} ms · {m['errors']} errors")
+    
     # Navigation
     st.sidebar.markdown("### Navigation")
     pages = {
@@ -2253,27 +2046,8 @@ def main():
     pages[choice]()
     
     if st.sidebar.button("🚪 Logout", use_container_width=True):
-        st.session_state.user = None
-        st.session_state.page = "auth"
-        st.session_state.completed_habits = set()
-        st.session_state.deleted_habits = set()
-        st.session_state.today_habits = []
-        st.session_state.active_timers = {}
-        st.session_state.timer_history = []
-        st.session_state.welcome_shown = False
-        st.session_state.alarm_history = []
-        st.session_state.user_habits_data = []
-        st.session_state.user_monthly_data = []
-        st.session_state.last_reset_date = None
-        st.session_state.weekly_stars = 0
-        st.session_state.alarms = {}
-        st.session_state.last_alarm_trigger = {}
-        st.session_state.show_alarm_popup = False
-        st.session_state.daily_habits_loaded = False
-        st.session_state.alarm_notification = None
-        st.session_state.active_alarm_sound = None
-        st.session_state.alarm_sound_playing = False
-        st.session_state.today_date_key = None
+        sess.reset()
+        reschedule_alarms()
         st.rerun()
 
 if __name__ == "__main__":
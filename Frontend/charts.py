@@ -0,0 +1,115 @@
+# Frontend/charts.py
+import functools
+import io
+import threading
+
+CHART_CACHE_SIZE = 128  # rendered images kept per chart type
+
+# pyplot keeps global state, so renders from concurrent sessions are serialized
+_render_lock = threading.Lock()
+
+def _pyplot():
+    """Import matplotlib on first chart render, using the non-GUI backend"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+def create_gradient_colors(base_color, num_colors):
+    """Create gradient colors from a base color"""
+    colors = []
+    for i in range(num_colors):
+        # Create lighter shades
+        factor = 0.8 + (i * 0.2) / num_colors
+        r = min(255, int(int(base_color[1:3], 16) * factor))
+        g = min(255, int(int(base_color[3:5], 16) * factor))
+        b = min(255, int(int(base_color[5:7], 16) * factor))
+        colors.append(f'#{r:02x}{g:02x}{b:02x}')
+    return colors
+
+def _to_png(plt, fig):
+    """Render a figure to PNG bytes and close it"""
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", facecolor=fig.get_facecolor(), bbox_inches="tight")
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def today_pie_chart_png(completed, pending):
+    """PNG of today's completed/pending pie chart"""
+    labels = ['Completed', 'Pending']
+    sizes = [completed, pending]
+
+    # Create beautiful gradient colors
+    completed_gradient = create_gradient_colors('#8A2BE2', 3)  # Violet gradient
+    pending_gradient = create_gradient_colors('#FF8E53', 3)    # Orange gradient
+
+    # Use the middle shade from each gradient
+    colors = [completed_gradient[1], pending_gradient[1]]
+
+    with _render_lock:
+        plt = _pyplot()
+        fig, ax = plt.subplots(figsize=(6, 6))
+
+        # Create the pie chart with gradient colors
+        wedges, texts, autotexts = ax.pie(
+            sizes,
+            labels=labels,
+            autopct='%1.1f%%',
+            colors=colors,
+            startangle=90,
+            textprops={'fontsize': 12, 'weight': 'bold', 'color': 'white'},
+            wedgeprops={'edgecolor': 'white', 'linewidth': 2, 'antialiased': True}
+        )
+
+        # Style the chart to perfectly match app theme
+        plt.setp(autotexts, size=12, weight="bold", color="white")
+        plt.setp(texts, size=12, color="white", weight="bold")
+        ax.set_title("Today's Habit Completion", fontsize=14, fontweight='bold', color='white', pad=20)
+
+        # Set background to match app exactly
+        ax.set_facecolor('#0a0e27')
+        fig.patch.set_facecolor('#0a0e27')
+
+        # Add subtle shadow effect to wedges
+        for wedge in wedges:
+            wedge.set_linewidth(2)
+            wedge.set_edgecolor('#FFFFFF')
+
+        return _to_png(plt, fig)
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def weekly_chart_png(daily_breakdown):
+    """PNG of the weekly bar chart; daily_breakdown is a tuple of (day_name, completion_rate)"""
+    days = [day_name[:3] for day_name, _ in daily_breakdown]
+    completion_rates = [rate for _, rate in daily_breakdown]
+
+    # Create gradient bars
+    colors = create_gradient_colors('#8A2BE2', len(days))
+
+    with _render_lock:
+        plt = _pyplot()
+        fig, ax = plt.subplots(figsize=(10, 6))
+
+        bars = ax.bar(days, completion_rates, color=colors, edgecolor='white', linewidth=2)
+
+        # Add value labels on bars
+        for bar, value in zip(bars, completion_rates):
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height + 1,
+                    f'{value:.0f}%', ha='center', va='bottom',
+                    fontweight='bold', color='white', fontsize=10)
+
+        ax.set_ylabel('Completion Rate (%)', color='white', fontweight='bold')
+        ax.set_ylim(0, 100)
+        ax.set_title('Weekly Progress Overview', color='white', fontweight='bold', pad=20)
+
+        # Style the chart
+        ax.set_facecolor('#0a0e27')
+        fig.patch.set_facecolor('#0a0e27')
+        ax.tick_params(colors='white', labelsize=10)
+        ax.grid(True, alpha=0.3, color='white')
+
+        return _to_png(plt, fig)
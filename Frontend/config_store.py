@@ -0,0 +1,79 @@
+# Frontend/config_store.py
+import copy
+import json
+import os
+import tempfile
+import threading
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+class JsonFileStore:
+    """
+    A JSON settings file kept in memory. load() only re-reads the file when
+    its mtime or size changes; save() writes a temp file and renames it over
+    the original, so readers never see a half-written file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def stamp(self):
+        """(mtime_ns, size) of the file, or None if it is missing."""
+        return self._file_stamp()
+
+    def load(self):
+        """Current contents ({} if missing or unreadable); callers get their own copy."""
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                self._data = self._read() if stamp else {}
+                self._stamp = stamp
+            return copy.deepcopy(self._data)
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading {self.path}: {e}")
+            return {}
+
+    def save(self, data):
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(data, f, indent=2)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            except Exception as e:
+                print(f"Error saving {self.path}: {e}")
+                return False
+            self._data = copy.deepcopy(data)
+            self._stamp = self._file_stamp()
+            return True
+
+def get_store(path):
+    """The process-wide store for path, shared by every Streamlit session."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = JsonFileStore(path)
+        return store
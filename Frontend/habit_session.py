@@ -0,0 +1,77 @@
+# Frontend/habit_session.py
+from collections import deque
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+SESSION_KEY = "habit_session"
+HISTORY_SIZE = 50  # timer and alarm history entries kept per session
+
+@dataclass(slots=True)
+class TimerEntry:
+    """A running (end_time None) or finished habit timer."""
+    habit_id: str
+    habit_name: str
+    start_time: datetime
+    target_minutes: int = 25
+    end_time: datetime = None
+
+    @property
+    def duration(self) -> timedelta:
+        return (self.end_time or datetime.now()) - self.start_time
+
+def _history():
+    return deque(maxlen=HISTORY_SIZE)
+
+@dataclass(slots=True)
+class HabitSession:
+    """Everything the app keeps for one browser session, under one session_state key."""
+    # Navigation and auth
+    page: str = "auth"
+    user: dict = None
+    auth_mode: str = "login"
+    current_page: str = "home"
+
+    # Today's habits
+    today_habits: list = field(default_factory=list)
+    completed_habits: set = field(default_factory=set)  # habit_ids
+    deleted_habits: set = field(default_factory=set)    # habit_ids
+    daily_habits_loaded: bool = False
+    today_date_key: str = None
+    last_reset_date: object = None
+
+    # Timers: habit_id -> running TimerEntry, plus the most recent finished ones
+    active_timers: dict = field(default_factory=dict)
+    timer_history: deque = field(default_factory=_history)
+
+    # Weekly progress
+    weekly_stars: int = 0
+    weekly_report_generated: bool = False
+    current_week_number: int = field(default_factory=lambda: datetime.now().isocalendar()[1])
+
+    # Alarms
+    alarms: dict = field(default_factory=dict)          # habit_name -> alarm_scheduler.Alarm
+    alarm_history: deque = field(default_factory=_history)
+    alarm_fired_seq: int = None  # last alarm_scheduler event this session has seen
+    alarm_sound_playing: bool = False
+    active_alarm_sound: object = None
+
+    # Popups and notifications
+    show_alarm_popup: bool = False
+    alarm_popup_message: str = ""
+    alarm_popup_type: str = ""
+    alarm_notification: str = None
+
+    def reset(self):
+        """Back to a fresh, logged-out session."""
+        fresh = HabitSession()
+        for f in fields(self):
+            setattr(self, f.name, getattr(fresh, f.name))
+
+def current() -> HabitSession:
+    """This browser session's HabitSession, created on first use."""
+    session = st.session_state.get(SESSION_KEY)
+    if session is None:
+        session = st.session_state[SESSION_KEY] = HabitSession()
+    return session
@@ -0,0 +1,42 @@
+# Frontend/tone_bank.py
+import functools
+import os
+
+import numpy as np
+import pygame
+
+SAMPLE_RATE = 44100
+MAX_SAMPLE = 2**(16 - 1) - 1
+
+SOUND_FILES = [
+    "alarm.mp3",
+    "alarm.wav",
+    "alarm_sound.mp3",
+    "beep.mp3",
+    "sounds/alarm.mp3"
+]
+
+def find_alarm_sound():
+    """Return the first alarm sound file found in the working or Frontend directory"""
+    for base in (os.getcwd(), os.path.dirname(os.path.abspath(__file__))):
+        for file in SOUND_FILES:
+            path = os.path.join(base, file)
+            if os.path.exists(path):
+                print(f"Found alarm sound: {path}")
+                return path
+    return None
+
+# Probed once per process, not on every alarm
+ALARM_SOUND_PATH = find_alarm_sound()
+
+def make_beep_buffer(frequency, duration_ms, sample_rate=SAMPLE_RATE):
+    """Stereo int16 sine wave, built in one vectorized NumPy pass"""
+    n_samples = int(round(duration_ms * 0.001 * sample_rate))
+    t = np.arange(n_samples) / sample_rate
+    wave = np.round(MAX_SAMPLE * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+    return np.column_stack((wave, wave))
+
+@functools.lru_cache(maxsize=16)
+def get_tone(frequency, duration_ms):
+    """Cached pygame Sound for a (frequency, duration) pair; the mixer must be initialized"""
+    return pygame.sndarray.make_sound(np.ascontiguousarray(make_beep_buffer(frequency, duration_ms)))
@@ -0,0 +1,63 @@
+# Frontend/ttl_cache.py
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+# Streamlit re-executes app.py on every rerun, so caches are kept here
+# (imported once per process) and looked up by the decorated function's name.
+_caches = {}
+_caches_lock = threading.Lock()
+
+def cache_data(ttl, maxsize=1024):
+    """
+    st.cache_data-style decorator with a time-to-live in seconds.
+
+    Results are cached per positional-argument tuple and, like
+    st.cache_data, callers always receive a copy. Calls returning a
+    falsy value or a dict with success=False are not cached. The wrapper
+    gets a clear(*args) method: with arguments it drops that one entry,
+    without arguments it drops every entry.
+
+    Entries are kept in expiry order; each write evicts the expired ones
+    and, past maxsize, the oldest, so keys that are never requested again
+    (e.g. ones containing yesterday's date) do not accumulate.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        with _caches_lock:
+            store = _caches.setdefault(name, {"entries": OrderedDict(), "lock": threading.Lock()})
+        entries = store["entries"]
+        lock = store["lock"]
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            with lock:
+                hit = entries.get(args)
+                if hit and hit[0] > now:
+                    return copy.deepcopy(hit[1])
+
+            value = func(*args)
+            if value and not (isinstance(value, dict) and value.get("success") is False):
+                with lock:
+                    entries[args] = (now + ttl, copy.deepcopy(value))
+                    entries.move_to_end(args)
+                    while entries:
+                        oldest_expiry = next(iter(entries.values()))[0]
+                        if oldest_expiry > now and len(entries) <= maxsize:
+                            break
+                        entries.popitem(last=False)
+            return value
+
+        def clear(*args):
+            with lock:
+                if args:
+                    entries.pop(args, None)
+                else:
+                    entries.clear()
+
+        wrapper.clear = clear
+        return wrapper
+    return decorator
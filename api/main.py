@@ -1,16 +1,31 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from postgrest.exceptions import APIError as PostgrestAPIError
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, date, timedelta
 from fastapi.middleware.cors import CORSMiddleware
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
 import sys, os
-import hashlib
+import asyncio
+import threading
+import time
 import uuid
 import json
+import csv
+import io
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
 import logic
 import db
+import history_store
+import passwords
+import user_cache
+import session_tokens
+import habit_import
 
 app = FastAPI(title="HabitHub API")
 
@@ -23,12 +38,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# -------------------------------
-# PASSWORD HELPER
-# -------------------------------
-def hash_password(password: str) -> str:
-    """Simple password hashing"""
-    return hashlib.sha256(password.encode()).hexdigest()
+@app.on_event("startup")
+async def create_async_client():
+    await db.init_async_client()
 
 # -------------------------------
 # MODELS
@@ -45,95 +57,199 @@ class UserLoginModel(BaseModel):
 class HabitAddModel(BaseModel):
     name: str
     description: str | None = None
-    user_id: str
     target_minutes: int = 25
 
+class HabitListModel(BaseModel):
+    fields: list[str] | None = None  # default: every habit field
+    limit: int = 100
+    cursor: str | None = None        # next_cursor from the previous page
+
 class HabitIDModel(BaseModel):
     habit_id: str
-    user_id: str
 
-class UserIDModel(BaseModel):
-    user_id: str
+class HabitRemoveModel(BaseModel):
+    habit_id: str
+    soft: bool = False
+
+class HabitIDsModel(BaseModel):
+    habit_ids: list[str]
+
+class HabitIDsRemoveModel(HabitIDsModel):
+    soft: bool = False
+
+class HabitExportModel(BaseModel):
+    format: Literal["ndjson", "csv"] = "ndjson"
+    start_date: date | None = None
+    end_date: date | None = None
+
+class ReminderModel(BaseModel):
+    habit_name: str
+    alarm_time: str  # "HH:MM"
+    days: list[str] = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    enabled: bool = True
+
+class ReminderKeyModel(BaseModel):
+    habit_name: str
 
 # -------------------------------
 # AUTH ROUTES
 # -------------------------------
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def current_user_id(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> str:
+    """user_id from the signed session token; no database lookup"""
+    user_id = session_tokens.verify_token(credentials.credentials) if credentials else None
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    return user_id
+
+USER_COLUMNS = "user_id, name, email, password"
+
+async def fetch_user_by_email(email, use_cache=True):
+    """User row for an email, from the in-process cache when possible"""
+    if use_cache:
+        cached = user_cache.users_by_email.get(email)
+        if cached:
+            return cached, True
+    result = await db.async_supabase.table("users").select(USER_COLUMNS).eq("email", email).limit(1).execute()
+    user_data = result.data[0] if result.data else None
+    if user_data:
+        user_cache.users_by_email.put(email, user_data)
+    return user_data, False
+
 @app.post("/auth/register")
-def register_user(user: UserRegisterModel):
+async def register_user(user: UserRegisterModel):
     try:
-        # Check if user already exists
-        existing = db.supabase.table("users").select("*").eq("email", user.email).execute()
-        if existing.data:
-            raise HTTPException(status_code=400, detail="User already exists with this email")
-        
-        # Create user with hashed password
+        # Create user with hashed password (KDF runs off the event loop)
         user_data = {
             "name": user.name,
             "email": user.email,
-            "password": hash_password(user.password),
+            "password": await passwords.ahash_password(user.password),
             "created_at": datetime.now().isoformat()
         }
         
-        result = db.supabase.table("users").insert(user_data).execute()
+        # Single insert; the unique index on users.email rejects duplicates
+        try:
+            result = await db.async_supabase.table("users").insert(user_data).execute()
+        except PostgrestAPIError as e:
+            if e.code == "23505":  # unique_violation
+                raise HTTPException(status_code=400, detail="User already exists with this email")
+            raise
+        
         if result.data:
+            user_cache.users_by_email.put(user.email, {
+                "user_id": result.data[0]["user_id"],
+                "name": result.data[0]["name"],
+                "email": user.email,
+                "password": user_data["password"]
+            })
             return {
                 "success": True, 
                 "user_id": result.data[0]["user_id"], 
                 "name": result.data[0]["name"],
+                "token": session_tokens.issue_token(result.data[0]["user_id"]),
                 "message": "Registration successful"
             }
         else:
             raise HTTPException(status_code=500, detail="Registration failed")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Registration error: {str(e)}")
 
 @app.post("/auth/login")
-def login_user(user: UserLoginModel):
+async def login_user(user: UserLoginModel):
     try:
-        hashed_password = hash_password(user.password)
-        result = db.supabase.table("users").select("*").eq("email", user.email).eq("password", hashed_password).execute()
+        # Unknown emails are verified against a dummy hash (stored=None), so a
+        # miss costs as much KDF time as a wrong password for a real user
+        user_data, cached = await fetch_user_by_email(user.email)
+        stored = user_data.get("password") if user_data else None
+        verified = await passwords.averify_password(user.password, stored) and bool(user_data)
         
-        if result.data:
-            user_data = result.data[0]
+        # A cached row may be stale; confirm a failure against the database once,
+        # re-running the KDF only if the password hash actually changed, so every
+        # failure costs one KDF plus one database round trip
+        if cached and not verified:
+            user_data, _ = await fetch_user_by_email(user.email, use_cache=False)
+            fresh = user_data.get("password") if user_data else None
+            if fresh and fresh != stored:
+                verified = await passwords.averify_password(user.password, fresh)
+        
+        if verified:
+            # Upgrade legacy or outdated hashes while we have the plain password
+            if passwords.needs_rehash(user_data["password"]):
+                new_hash = await passwords.ahash_password(user.password)
+                await db.async_supabase.table("users")\
+                    .update({"password": new_hash})\
+                    .eq("user_id", user_data["user_id"])\
+                    .execute()
+                user_cache.users_by_email.put(user.email, dict(user_data, password=new_hash))
             return {
                 "success": True, 
                 "user_id": user_data["user_id"], 
                 "name": user_data["name"],
+                "token": session_tokens.issue_token(user_data["user_id"]),
                 "message": "Login successful"
             }
         else:
             raise HTTPException(status_code=401, detail="Invalid email or password")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Login error: {str(e)}")
 
 # -------------------------------
-# HABIT ROUTES - STORE IN JSON FOR HISTORICAL DATA
+# HABIT ROUTES
 # -------------------------------
+def canonical_habit_ids(habit_ids):
+    """
+    {canonical uuid string: id as sent} for the ids that parse as UUIDs.
+    Unparseable ids cannot match a habit and would fail the whole uuid[]
+    cast; Postgres returns ids in canonical (lowercase) form.
+    """
+    canonical = {}
+    for hid in habit_ids:
+        try:
+            canonical[str(uuid.UUID(hid))] = hid
+        except ValueError:
+            pass
+    return canonical
+
+async def remove_habits_rpc(habit_ids, user_id, soft):
+    """Cascade (or soft) delete of the user's habits in one round trip"""
+    result = await db.async_supabase.rpc("remove_habits", {"hids": habit_ids, "uid": user_id, "soft": soft}).execute()
+    return result.data or {}
+
 @app.post("/habit/add")
-def add_habit(habit: HabitAddModel):
+async def add_habit(habit: HabitAddModel, user_id: str = Depends(current_user_id)):
     try:
         # Store habit in database
         habit_data = {
             "name": habit.name,
             "description": habit.description,
-            "user_id": habit.user_id,
+            "user_id": user_id,
             "created_at": datetime.now().isoformat()
         }
         
-        result = db.supabase.table("habits").insert(habit_data).execute()
+        result = await db.async_supabase.table("habits").insert(habit_data).execute()
         
         if result.data:
             # Create today's log for the new habit
             today = date.today().isoformat()
             log_data = {
                 "habit_id": result.data[0]["habit_id"],
-                "user_id": habit.user_id,
+                "user_id": user_id,
                 "date": today,
                 "completed": False
             }
-            db.supabase.table("habit_logs").insert(log_data).execute()
+            # A log the daily job already created for this habit is left as is
+            log_result = await db.async_supabase.table("habit_logs").upsert(
+                log_data, on_conflict="habit_id,date", ignore_duplicates=True
+            ).execute()
+            if log_result.data:
+                await db.abump_weekly_rollup(user_id, total_delta=1)
             
             return {
                 "success": True,
@@ -145,61 +261,138 @@ def add_habit(habit: HabitAddModel):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+HABIT_LIST_MAX_LIMIT = 1000
+
 @app.post("/habit/list")
-def list_habits(user: UserIDModel):
+async def list_habits(h: HabitListModel | None = None, user_id: str = Depends(current_user_id)):
+    h = h or HabitListModel()
     try:
-        result = db.supabase.table("habits").select("*").eq("user_id", user.user_id).execute()
-        return {"success": True, "habits": result.data}
+        columns = db.habit_columns(h.fields)
+        after = db.decode_habit_cursor(h.cursor) if h.cursor else None
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    
+    limit = max(1, min(h.limit, HABIT_LIST_MAX_LIMIT))
+    try:
+        # One extra row tells us whether another page exists
+        result = await db.habits_query(db.async_supabase, user_id, columns, limit + 1, after).execute()
+        habits = result.data or []
+        next_cursor = db.encode_habit_cursor(habits[limit - 1]) if len(habits) > limit else None
+        habits = habits[:limit]
+        if h.fields:
+            habits = [{f: habit.get(f) for f in h.fields} for habit in habits]
+        return {"success": True, "habits": habits, "next_cursor": next_cursor}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.post("/habit/complete")
-def complete_habit(h: HabitIDModel):
+async def complete_habit(h: HabitIDModel, user_id: str = Depends(current_user_id)):
     try:
-        # Update habit log for today
-        today = date.today().isoformat()
-        result = db.supabase.table("habit_logs")\
-            .update({"completed": True})\
-            .eq("habit_id", h.habit_id)\
-            .eq("user_id", h.user_id)\
-            .eq("date", today)\
-            .execute()
+        # Atomic upsert of today's log (also updates the weekly rollup)
+        result = await db.async_supabase.rpc(
+            "complete_habit_today", {"hid": h.habit_id, "uid": user_id, "day": date.today().isoformat()}
+        ).execute()
+        if not result.data:
+            return {"success": False, "error": "Habit not found"}
         
-        return {"success": True, "message": "Habit completed successfully"}
+        return {"success": True, "message": "Habit completed successfully", "log": result.data[0]}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.post("/habit/remove")
-def remove_habit(h: HabitIDModel):
+async def remove_habit(h: HabitRemoveModel, user_id: str = Depends(current_user_id)):
+    try:
+        counts = await remove_habits_rpc([h.habit_id], user_id, h.soft)
+        if not counts.get("habits_deleted"):
+            return {"success": False, "error": "Habit not found"}
+        
+        return {
+            "success": True,
+            "message": "Habit removed successfully",
+            "habits_deleted": counts["habits_deleted"],
+            "logs_deleted": counts.get("logs_deleted", 0),
+            "logs_pending_purge": counts.get("logs_pending_purge", 0)
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/habit/complete-batch")
+async def complete_habits_batch(h: HabitIDsModel, user_id: str = Depends(current_user_id)):
+    try:
+        habit_ids = list(dict.fromkeys(h.habit_ids))
+        if not habit_ids:
+            return {"success": True, "results": {}}
+        
+        canonical = canonical_habit_ids(habit_ids)
+        
+        # One upsert for every habit's log for today (also updates the weekly rollup)
+        data = {}
+        if canonical:
+            result = await db.async_supabase.rpc("complete_habits_today", {
+                "hids": list(canonical),
+                "uid": user_id,
+                "day": date.today().isoformat()
+            }).execute()
+            data = result.data or {}
+        
+        completed = {canonical[hid] for hid in data.get("completed") or [] if hid in canonical}
+        already = {canonical[hid] for hid in data.get("already_completed") or [] if hid in canonical}
+        results = {
+            hid: "completed" if hid in completed else "already_completed" if hid in already else "not_found"
+            for hid in habit_ids
+        }
+        return {"success": True, "completed": len(completed), "results": results}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/habit/remove-batch")
+async def remove_habits_batch(h: HabitIDsRemoveModel, user_id: str = Depends(current_user_id)):
     try:
-        # Remove habit and its logs
-        db.supabase.table("habit_logs").delete().eq("habit_id", h.habit_id).execute()
-        db.supabase.table("habits").delete().eq("habit_id", h.habit_id).execute()
+        habit_ids = list(dict.fromkeys(h.habit_ids))
+        if not habit_ids:
+            return {"success": True, "results": {}}
         
-        return {"success": True, "message": "Habit removed successfully"}
+        canonical = canonical_habit_ids(habit_ids)
+        counts = await remove_habits_rpc(list(canonical), user_id, h.soft) if canonical else {}
+        removed = {canonical[hid] for hid in counts.get("removed_ids") or [] if hid in canonical}
+        results = {hid: "removed" if hid in removed else "not_found" for hid in habit_ids}
+        return {
+            "success": True,
+            "removed": len(removed),
+            "logs_deleted": counts.get("logs_deleted", 0),
+            "logs_pending_purge": counts.get("logs_pending_purge", 0),
+            "results": results
+        }
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.post("/habit/today-status")
-def today_status(user: UserIDModel):
+async def today_status(user_id: str = Depends(current_user_id)):
     try:
-        user_id = user.user_id
         today = date.today().isoformat()
         
-        # Get today's habits with completion status
-        result = db.supabase.table("habit_logs")\
-            .select("*, habits(*)")\
-            .eq("user_id", user_id)\
-            .eq("date", today)\
-            .execute()
+        # Fetch today's logs and the user's habits concurrently
+        logs_resp, habits_resp = await asyncio.gather(
+            db.async_supabase.table("habit_logs")
+                .select("habit_id, completed")
+                .eq("user_id", user_id)
+                .eq("date", today)
+                .execute(),
+            db.async_supabase.table("habits")
+                .select("habit_id, name, description")
+                .eq("user_id", user_id)
+                .is_("deleted_at", "null")
+                .execute()
+        )
+        habits_by_id = {h["habit_id"]: h for h in habits_resp.data or []}
         
         habits = []
         total_habits = 0
         completed_habits = 0
         
-        for log in result.data:
-            if log.get('habits'):
-                habit_data = log['habits']
+        for log in logs_resp.data or []:
+            habit_data = habits_by_id.get(log["habit_id"])
+            if habit_data:
                 total_habits += 1
                 completed = log.get('completed', False)
                 
@@ -227,58 +420,32 @@ def today_status(user: UserIDModel):
         return {"success": False, "error": str(e)}
 
 @app.post("/habit/weekly-performance")
-def weekly_performance(user: UserIDModel):
+async def weekly_performance(user_id: str = Depends(current_user_id)):
     try:
-        user_id = user.user_id
         today = date.today()
         
         # Calculate week start (Monday)
         start_of_week = today - timedelta(days=today.weekday())
         end_of_week = start_of_week + timedelta(days=6)
         
-        # Calculate weekly performance from JSON files
+        # Calculate weekly performance from the history store (SQLite, off the event loop)
+        totals = await asyncio.to_thread(history_store.daily_totals, user_id, start_of_week, end_of_week)
         total_habits = 0
         completed_habits = 0
         daily_breakdown = []
         
-        # Initialize daily breakdown
         for i in range(7):
             day_date = start_of_week + timedelta(days=i)
+            day_total, day_completed = totals.get(day_date.isoformat(), (0, 0))
             daily_breakdown.append({
                 "date": day_date.isoformat(),
                 "day_name": day_date.strftime('%A'),
-                "total_habits": 0,
-                "completed_habits": 0,
-                "completion_rate": 0
+                "total_habits": day_total,
+                "completed_habits": day_completed,
+                "completion_rate": round((day_completed / day_total) * 100, 1) if day_total > 0 else 0
             })
-        
-        # Load data from JSON files for each day of the week
-        current_date = start_of_week
-        while current_date <= end_of_week:
-            date_str = current_date.strftime('%Y%m%d')
-            history_file = f"habit_history_{date_str}.json"
-            
-            if os.path.exists(history_file):
-                with open(history_file, 'r') as f:
-                    day_data = json.load(f)
-                    user_day_habits = day_data.get(user_id, [])
-                    
-                    day_total = len(user_day_habits)
-                    day_completed = sum(1 for habit in user_day_habits if habit.get('completed', False))
-                    
-                    # Update daily breakdown
-                    for day_data in daily_breakdown:
-                        if day_data["date"] == current_date.isoformat():
-                            day_data["total_habits"] = day_total
-                            day_data["completed_habits"] = day_completed
-                            if day_total > 0:
-                                day_data["completion_rate"] = round((day_completed / day_total) * 100, 1)
-                            break
-                    
-                    total_habits += day_total
-                    completed_habits += day_completed
-            
-            current_date += timedelta(days=1)
+            total_habits += day_total
+            completed_habits += day_completed
         
         # Calculate overall completion
         overall_completion = (completed_habits / total_habits * 100) if total_habits > 0 else 0
@@ -297,120 +464,416 @@ def weekly_performance(user: UserIDModel):
         return {"success": False, "error": str(e)}
 
 @app.post("/weekly/report")
-def weekly_report(user: UserIDModel):
+async def weekly_report(user_id: str = Depends(current_user_id)):
     try:
-        # Calculate weekly performance using database approach from second code
-        today = date.today()
-        start_of_week = today - timedelta(days=today.weekday())  # Monday
-        
-        result = db.supabase.table("habit_logs")\
-            .select("completed")\
-            .eq("user_id", user.user_id)\
-            .gte("date", start_of_week.isoformat())\
+        # One weekly_rollups row, kept current by add/complete/remove
+        performance = await db.aget_weekly_performance(user_id)
+        return {"success": True, **performance}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+# -------------------------------
+# EXPORT
+# -------------------------------
+EXPORT_PAGE_SIZE = 1000  # log rows fetched per keyset page
+EXPORT_COLUMNS = ["date", "habit_id", "habit_name", "completed"]
+
+def export_page_query(user_id, start_date, end_date, after=None):
+    """One page of the user's logs ordered by (date, id), starting after the (date, id) key"""
+    query = db.async_supabase.table("habit_logs")\
+        .select("id, habit_id, date, completed, habits!inner(name)")\
+        .eq("user_id", user_id)\
+        .is_("habits.deleted_at", "null")
+    if start_date:
+        query = query.gte("date", start_date.isoformat())
+    if end_date:
+        query = query.lte("date", end_date.isoformat())
+    if after:
+        last_date, last_id = after
+        query = query.or_(f"date.gt.{last_date},and(date.eq.{last_date},id.gt.{last_id})")
+    return query.order("date").order("id").limit(EXPORT_PAGE_SIZE)
+
+def export_row(log):
+    return {
+        "date": log["date"],
+        "habit_id": log["habit_id"],
+        "habit_name": (log.get("habits") or {}).get("name"),
+        "completed": bool(log.get("completed")),
+    }
+
+def format_export_rows(rows, fmt):
+    if fmt == "csv":
+        buf = io.StringIO()
+        csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS).writerows(rows)
+        return buf.getvalue()
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+async def stream_export(first_page, user_id, h: HabitExportModel):
+    """
+    Yield the export one page at a time. Only the current page is held in
+    memory, whatever the length of the history.
+    """
+    if h.format == "csv":
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+    page = first_page
+    while page:
+        yield format_export_rows([export_row(log) for log in page], h.format)
+        if len(page) < EXPORT_PAGE_SIZE:
+            return
+        after = (page[-1]["date"], page[-1]["id"])
+        try:
+            page = (await export_page_query(user_id, h.start_date, h.end_date, after).execute()).data
+        except Exception as e:
+            # Headers are already sent; end the stream early
+            print(f"Export error for {user_id}: {e}")
+            return
+
+@app.post("/habit/export")
+async def export_habits(h: HabitExportModel, user_id: str = Depends(current_user_id)):
+    """Stream the user's full log history as NDJSON or CSV"""
+    if h.start_date and h.end_date and h.start_date > h.end_date:
+        return {"success": False, "error": "start_date must not be after end_date"}
+    try:
+        # Fetch the first page up front so query errors still get a JSON response
+        first_page = (await export_page_query(user_id, h.start_date, h.end_date).execute()).data or []
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    
+    media_type = "text/csv" if h.format == "csv" else "application/x-ndjson"
+    filename = f"habit_history.{'csv' if h.format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        stream_export(first_page, user_id, h),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# -------------------------------
+# IMPORT
+# -------------------------------
+IMPORT_CHUNK_SIZE = 500   # rows per batch insert
+IMPORT_MAX_ERRORS = 100   # row errors listed in the report (all are counted)
+
+@app.post("/habit/import")
+async def import_habits(request: Request, format: Literal["ndjson", "csv"] = "ndjson",
+                        user_id: str = Depends(current_user_id)):
+    """
+    Import habits and historical completions from a streamed NDJSON or CSV
+    body (the /habit/export format). Rows are validated as they arrive and
+    written in batches; bad rows are reported without stopping the import.
+    """
+    started = time.perf_counter()
+    report = {"rows_read": 0, "habits_created": 0, "logs_imported": 0,
+              "duplicates_skipped": 0, "error_count": 0, "errors": []}
+    try:
+        existing = await db.async_supabase.table("habits").select("habit_id, name")\
+            .eq("user_id", user_id)\
+            .is_("deleted_at", "null")\
             .execute()
-        
-        total_logs = len(result.data)
-        completed_logs = sum(1 for log in result.data if log.get('completed', False))
-        
-        completion_pct = (completed_logs / total_logs * 100) if total_logs > 0 else 0
-        stars = min(5, int(completion_pct / 20))  # 5 stars for 100%
-        
-        return {
-            "success": True,
-            "completion_pct": round(completion_pct, 1),
-            "stars": stars,
-            "total_habits": total_logs,
-            "completed_habits": completed_logs,
-            "week_start": start_of_week.isoformat(),
-            "week_end": (start_of_week + timedelta(days=6)).isoformat()
-        }
     except Exception as e:
         return {"success": False, "error": str(e)}
+    
+    habit_ids = {h["name"]: h["habit_id"] for h in existing.data or []}
+    new_habits = {}      # name -> (description, line_number of a habit-only row or None), waiting for the next batch insert
+    created_ids = []
+    pending_logs = []    # (line_number, validated row)
+    rollup_deltas = defaultdict(lambda: [0, 0])  # week_start -> [total, completed]
+    
+    def record_error(line_number, message):
+        report["error_count"] += 1
+        if len(report["errors"]) < IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line_number, "error": message})
+    
+    def count_inserted_logs(logs):
+        for log in logs:
+            delta = rollup_deltas[db.week_start_for(log["date"]).isoformat()]
+            delta[0] += 1
+            delta[1] += 1 if log.get("completed") else 0
+    
+    async def flush_habits():
+        pending = list(new_habits.items())
+        new_habits.clear()
+        for i in range(0, len(pending), IMPORT_CHUNK_SIZE):
+            chunk = pending[i:i + IMPORT_CHUNK_SIZE]
+            rows = [{"name": name, "description": description, "user_id": user_id,
+                     "created_at": datetime.now().isoformat()}
+                    for name, (description, _) in chunk]
+            try:
+                result = await db.async_supabase.table("habits").insert(rows).execute()
+            except Exception as e:
+                print(f"Import habit batch failed for {user_id}: {e}")
+                # Rows with a date are reported with their logs in flush()
+                for name, (_, line_number) in chunk:
+                    if line_number is not None:
+                        record_error(line_number, f"habit {name!r} could not be created: {e}")
+                continue
+            for habit in result.data or []:
+                habit_ids[habit["name"]] = habit["habit_id"]
+                created_ids.append(habit["habit_id"])
+            report["habits_created"] += len(result.data or [])
+    
+    async def flush():
+        if new_habits:
+            await flush_habits()
+        if not pending_logs:
+            return
+        batch = []
+        for line_number, row in pending_logs:
+            if row["habit_name"] in habit_ids:
+                batch.append((line_number, row))
+            else:
+                record_error(line_number, f"habit {row['habit_name']!r} could not be created")
+        pending_logs.clear()
+        if not batch:
+            return
+        logs = [{"habit_id": habit_ids[row["habit_name"]], "user_id": user_id,
+                 "date": row["date"], "completed": row["completed"]}
+                for _, row in batch]
+        try:
+            # Existing (habit, date) logs are kept; only new rows come back
+            result = await db.async_supabase.table("habit_logs")\
+                .upsert(logs, on_conflict="habit_id,date", ignore_duplicates=True)\
+                .execute()
+        except Exception as e:
+            for line_number, _ in batch:
+                record_error(line_number, f"batch insert failed: {e}")
+            return
+        inserted = result.data or []
+        report["logs_imported"] += len(inserted)
+        report["duplicates_skipped"] += len(logs) - len(inserted)
+        count_inserted_logs(inserted)
+    
+    header = None
+    today = date.today()
+    async for line_number, line in habit_import.iter_lines(request.stream()):
+        if not line.strip():
+            continue
+        try:
+            if format == "csv" and header is None:
+                header = habit_import.parse_header(line)
+                continue
+            report["rows_read"] += 1
+            row = habit_import.validate_record(habit_import.parse_line(line, format, header), today)
+        except habit_import.ImportRowError as e:
+            if format == "csv" and header is None:
+                return {"success": False, "error": str(e)}
+            record_error(line_number, str(e))
+            continue
+        
+        if row["habit_name"] not in habit_ids and row["habit_name"] not in new_habits:
+            new_habits[row["habit_name"]] = (row["description"], None if row["date"] else line_number)
+        if row["date"]:
+            pending_logs.append((line_number, row))
+        if len(pending_logs) >= IMPORT_CHUNK_SIZE or len(new_habits) >= IMPORT_CHUNK_SIZE:
+            await flush()
+    await flush()
+    
+    # New habits get today's log, as with /habit/add
+    if created_ids:
+        today_logs = [{"habit_id": hid, "user_id": user_id, "date": today.isoformat(), "completed": False}
+                      for hid in created_ids]
+        try:
+            for i in range(0, len(today_logs), IMPORT_CHUNK_SIZE):
+                result = await db.async_supabase.table("habit_logs")\
+                    .upsert(today_logs[i:i + IMPORT_CHUNK_SIZE], on_conflict="habit_id,date", ignore_duplicates=True)\
+                    .execute()
+                count_inserted_logs(result.data or [])
+        except Exception as e:
+            print(f"Import today logs failed for {user_id}: {e}")
+    
+    await asyncio.gather(*(
+        db.abump_weekly_rollup(user_id, total, completed, week_start)
+        for week_start, (total, completed) in rollup_deltas.items()
+    ))
+    
+    elapsed = time.perf_counter() - started
+    report["duration_seconds"] = round(elapsed, 2)
+    report["rows_per_second"] = round(report["rows_read"] / elapsed, 1) if elapsed > 0 else 0
+    return {"success": True, **report}
 
 # -------------------------------
 # APScheduler Tasks
 # -------------------------------
 scheduler = BackgroundScheduler()
 
+DAILY_LOG_PAGE_SIZE = 1000   # PostgREST returns at most 1000 rows per request
+DAILY_LOG_INSERT_CHUNK = 500  # rows per batch insert
+
+def fetch_all_rows(build_query, page_size=DAILY_LOG_PAGE_SIZE):
+    """
+    Page through a query with .range() and return every row.
+    build_query must return a fresh query builder on each call.
+    """
+    rows = []
+    start = 0
+    while True:
+        resp = build_query().range(start, start + page_size - 1).execute()
+        page = resp.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+def insert_in_chunks(table, rows, chunk_size=DAILY_LOG_INSERT_CHUNK):
+    """
+    Insert rows into a table in batches of chunk_size rows. Rows that already
+    exist (same habit_id and date) are skipped rather than failing the batch,
+    so an overlapping or re-run job is harmless. Returns the number inserted.
+    """
+    inserted = 0
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        resp = db.supabase.table(table).upsert(chunk, on_conflict="habit_id,date", ignore_duplicates=True).execute()
+        inserted += len(resp.data or [])
+    return inserted
+
 def daily_task():
     """
-    Generate daily logs for all active habits at the start of the day
+    Generate daily logs for all active habits at the start of the day.
+
+    Works set-based: one paged read of all habits, one paged read of
+    today's existing logs, then chunked batch inserts for the missing
+    (habit_id, date) pairs.
     """
+    started = time.perf_counter()
+    today = date.today().isoformat()
+    report = {"date": today, "habits_scanned": 0, "logs_created": 0, "duration_seconds": 0}
     try:
-        users_resp = db.supabase.table("users").select("user_id").execute()
-        if users_resp.data:
-            for u in users_resp.data:
-                user_id = u["user_id"]
-                today = date.today().isoformat()
-                
-                # Get all active habits for this user
-                habits_resp = db.supabase.table("habits").select("habit_id").eq("user_id", user_id).execute()
-                habits = habits_resp.data
-                
-                for h in habits:
-                    # Check if today's log exists
-                    logs = db.supabase.table("habit_logs").select("*")\
-                        .eq("habit_id", h["habit_id"])\
-                        .eq("date", today)\
-                        .execute()
-                    
-                    if not logs.data:
-                        # Create today's log
-                        db.supabase.table("habit_logs").insert({
-                            "habit_id": h["habit_id"],
-                            "user_id": user_id,
-                            "date": today,
-                            "completed": False
-                        }).execute()
-                        
-        print(f"Daily logs created for {date.today().isoformat()}")
+        habits = fetch_all_rows(
+            lambda: db.supabase.table("habits").select("habit_id, user_id").is_("deleted_at", "null").order("habit_id")
+        )
+        existing = fetch_all_rows(
+            lambda: db.supabase.table("habit_logs").select("habit_id").eq("date", today).order("habit_id")
+        )
+        logged_ids = {log["habit_id"] for log in existing}
+
+        missing_logs = [
+            {
+                "habit_id": h["habit_id"],
+                "user_id": h["user_id"],
+                "date": today,
+                "completed": False
+            }
+            for h in habits if h["habit_id"] not in logged_ids
+        ]
+
+        report["habits_scanned"] = len(habits)
+        report["logs_created"] = insert_in_chunks("habit_logs", missing_logs)
+        if report["logs_created"]:
+            db.rebuild_weekly_rollups()
     except Exception as e:
         print(f"Daily task error: {e}")
+        report["error"] = str(e)
+
+    report["duration_seconds"] = round(time.perf_counter() - started, 3)
+    print(f"Daily logs report: {report}")
+    return report
+
+WEEKLY_USER_CHUNK = 500    # users fetched and stored per page
+WEEKLY_WORKERS = 8         # concurrent performance calculations
+WEEKLY_CHECKPOINT_FILE = os.getenv(
+    "HABITHUB_WEEKLY_CHECKPOINT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "weekly_task_checkpoint.json")
+)
+
+def read_weekly_checkpoint():
+    """The checkpoint file's contents, or {} if there is none"""
+    try:
+        if os.path.exists(WEEKLY_CHECKPOINT_FILE):
+            with open(WEEKLY_CHECKPOINT_FILE, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error reading weekly checkpoint: {e}")
+    return {}
+
+def load_weekly_checkpoint(week_key):
+    """Return (last user_id finished, users processed) for week_key's run, or (None, 0)"""
+    checkpoint = read_weekly_checkpoint()
+    if checkpoint.get("week") == week_key and not checkpoint.get("done"):
+        return checkpoint.get("last_user_id"), checkpoint.get("processed", 0)
+    return None, 0
+
+def resume_weekly_task():
+    """
+    Schedule a one-off weekly_task for a run a crash left unfinished. The
+    cron job only fires on Sunday night and APScheduler does not replay
+    missed runs, so without this the checkpoint would never be used.
+    """
+    checkpoint = read_weekly_checkpoint()
+    if checkpoint.get("week") and not checkpoint.get("done"):
+        print(f"Unfinished weekly task for week {checkpoint['week']}; resuming")
+        scheduler.add_job(weekly_task, kwargs={"week_key": checkpoint["week"]}, misfire_grace_time=None)
+
+def save_weekly_checkpoint(week_key, last_user_id, processed, done=False):
+    """Write the checkpoint through a temp file so a crash never leaves it half-written"""
+    tmp_path = WEEKLY_CHECKPOINT_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "week": week_key,
+            "last_user_id": last_user_id,
+            "processed": processed,
+            "done": done,
+            "updated_at": datetime.now().isoformat()
+        }, f)
+    os.replace(tmp_path, WEEKLY_CHECKPOINT_FILE)
 
-def weekly_task():
+def weekly_task(week_key=None):
     """
-    Calculate weekly performance for all users on Sunday
+    Calculate weekly performance for all users on Sunday.
+
+    Users are paged by user_id in chunks, computed on a bounded thread pool
+    and stored with one batch upsert per chunk. The last finished user_id is
+    checkpointed, so a crashed run resumes where it stopped; resume_weekly_task
+    passes the checkpoint's week_key, which also skips the Sunday check.
     """
     try:
-        if datetime.today().weekday() == 6:  # Sunday
-            users_resp = db.supabase.table("users").select("user_id").execute()
-            if users_resp.data:
-                for u in users_resp.data:
-                    # Calculate weekly performance
-                    user_id = u['user_id']
-                    weekly_performance = calculate_weekly_performance(user_id)
-                    
-                    # Store weekly report
-                    store_weekly_report(user_id, weekly_performance)
-                    print(f"Weekly performance calculated for user {user_id}: {weekly_performance}")
+        if week_key is None:
+            if datetime.today().weekday() != 6:  # Sunday
+                return
+            week_key = db.week_start_for().isoformat()
+        
+        # A resumed run reports on the week it started in, not the current one
+        week_end = date.fromisoformat(week_key) + timedelta(days=6)
+        last_user_id, processed = load_weekly_checkpoint(week_key)
+        started = time.perf_counter()
+        if last_user_id:
+            print(f"Resuming weekly task after user {last_user_id} ({processed} users already done)")
+        
+        with ThreadPoolExecutor(max_workers=WEEKLY_WORKERS) as pool:
+            while True:
+                query = db.supabase.table("users").select("user_id").order("user_id").limit(WEEKLY_USER_CHUNK)
+                if last_user_id:
+                    query = query.gt("user_id", last_user_id)
+                user_ids = [u["user_id"] for u in query.execute().data or []]
+                if not user_ids:
+                    break
+                
+                performances = pool.map(calculate_weekly_performance, user_ids, [week_end] * len(user_ids))
+                store_weekly_reports(zip(user_ids, performances))
+                
+                processed += len(user_ids)
+                last_user_id = user_ids[-1]
+                save_weekly_checkpoint(week_key, last_user_id, processed)
+                print(f"Weekly task: {processed} users done ({time.perf_counter() - started:.1f}s)")
+                
+                if len(user_ids) < WEEKLY_USER_CHUNK:
+                    break
+        
+        save_weekly_checkpoint(week_key, last_user_id, processed, done=True)
+        print(f"Weekly performance calculated for {processed} users in {time.perf_counter() - started:.1f}s")
     except Exception as e:
         print(f"Weekly task error: {e}")
 
-def calculate_weekly_performance(user_id):
-    """Calculate weekly performance for a user"""
+def calculate_weekly_performance(user_id, end_date=None):
+    """Calculate weekly performance for a user over the 7 days up to end_date (default today)"""
     try:
         # Get habits from last 7 days
-        end_date = datetime.now().date()
+        end_date = end_date or datetime.now().date()
         start_date = end_date - timedelta(days=7)
         
-        weekly_habits = []
-        total_habits = 0
-        completed_habits = 0
-        
-        # Load habit history from JSON files
-        current_date = start_date
-        while current_date <= end_date:
-            history_file = f"habit_history_{current_date.strftime('%Y%m%d')}.json"
-            if os.path.exists(history_file):
-                with open(history_file, 'r') as f:
-                    day_data = json.load(f)
-                    user_day_habits = day_data.get(user_id, [])
-                    for habit in user_day_habits:
-                        total_habits += 1
-                        if habit.get('completed', False):
-                            completed_habits += 1
-                    weekly_habits.extend(user_day_habits)
-            current_date += timedelta(days=1)
+        # Load habit history from the history store
+        totals = history_store.daily_totals(user_id, start_date, end_date)
+        total_habits = sum(total for total, _ in totals.values())
+        completed_habits = sum(completed for _, completed in totals.values())
         
         # Calculate completion percentage
         completion_pct = (completed_habits / total_habits * 100) if total_habits > 0 else 0
@@ -426,25 +889,158 @@ def calculate_weekly_performance(user_id):
         print(f"Error calculating weekly performance: {e}")
         return {"total_habits": 0, "completed_habits": 0, "completion_pct": 0}
 
-def store_weekly_report(user_id, performance_data):
-    """Store weekly report in database"""
+def weekly_report_row(user_id, performance_data):
+    return {
+        "user_id": user_id,
+        "week_start": performance_data["week_start"],
+        "week_end": performance_data["week_end"],
+        "total_habits": performance_data["total_habits"],
+        "completed_habits": performance_data["completed_habits"],
+        "completion_percentage": performance_data["completion_pct"],
+        "created_at": datetime.now().isoformat()
+    }
+
+def store_weekly_reports(performances):
+    """
+    Store (user_id, performance_data) pairs with a single batch upsert. A chunk
+    stored just before a crash is written again on resume; the upsert on
+    (user_id, week_start) keeps that from duplicating reports.
+    """
+    rows = [
+        weekly_report_row(user_id, data)
+        for user_id, data in performances
+        if "week_start" in data  # skip users whose calculation failed
+    ]
+    if rows:
+        db.supabase.table("weekly_reports").upsert(rows, on_conflict="user_id,week_start").execute()
+
+PURGE_BATCH_SIZE = 100  # soft-deleted habits hard-deleted per statement
+
+def purge_task():
+    """
+    Hard-delete soft-deleted habits (logs cascade) in small batches,
+    so no single statement has to remove years of logs at once.
+    """
+    purged = 0
     try:
-        db.supabase.table("weekly_reports").insert({
-            "user_id": user_id,
-            "week_start": performance_data["week_start"],
-            "week_end": performance_data["week_end"],
-            "total_habits": performance_data["total_habits"],
-            "completed_habits": performance_data["completed_habits"],
-            "completion_percentage": performance_data["completion_pct"],
-            "created_at": datetime.now().isoformat()
-        }).execute()
+        while True:
+            resp = db.supabase.rpc("purge_deleted_habits", {"batch": PURGE_BATCH_SIZE}).execute()
+            count = resp.data or 0
+            purged += count
+            if count < PURGE_BATCH_SIZE:
+                break
+        print(f"Purged {purged} soft-deleted habits")
     except Exception as e:
-        print(f"Error storing weekly report: {e}")
+        print(f"Purge task error: {e}")
+    return purged
 
 # Schedule tasks
 scheduler.add_job(daily_task, 'cron', hour=0, minute=1)  # Run daily at 12:01 AM
 scheduler.add_job(weekly_task, 'cron', day_of_week='sun', hour=23, minute=59)  # Run weekly on Sunday
+scheduler.add_job(purge_task, 'cron', hour=3, minute=0)  # Purge soft-deleted habits at 3 AM
 scheduler.start()
+resume_weekly_task()
+
+# -------------------------------
+# REMINDER ENGINE
+# -------------------------------
+DAY_ABBREVIATIONS = {
+    "Monday": "mon", "Tuesday": "tue", "Wednesday": "wed", "Thursday": "thu",
+    "Friday": "fri", "Saturday": "sat", "Sunday": "sun"
+}
+MAX_PENDING_EVENTS = 50  # per user, oldest dropped first
+
+reminder_events = defaultdict(lambda: deque(maxlen=MAX_PENDING_EVENTS))
+reminder_events_lock = threading.Lock()
+
+def reminder_job_id(user_id, habit_name):
+    return f"reminder:{user_id}:{habit_name}"
+
+def fire_reminder(user_id, habit_name, alarm_time, days):
+    """Scheduler job: record a fired reminder for the user's next fetch"""
+    with reminder_events_lock:
+        reminder_events[user_id].append({
+            "habit_name": habit_name,
+            "alarm_time": alarm_time,
+            "days": days,
+            "fired_at": datetime.now().isoformat()
+        })
+
+def schedule_reminder(reminder):
+    """Add or replace the cron job for one reminder row"""
+    job_id = reminder_job_id(reminder["user_id"], reminder["habit_name"])
+    day_of_week = ",".join(DAY_ABBREVIATIONS[d] for d in reminder.get("days") or [] if d in DAY_ABBREVIATIONS)
+    if not reminder.get("enabled", True) or not day_of_week:
+        unschedule_reminder(reminder["user_id"], reminder["habit_name"])
+        return
+    hour, minute = (int(part) for part in reminder["alarm_time"].split(":")[:2])
+    scheduler.add_job(
+        fire_reminder, 'cron',
+        day_of_week=day_of_week, hour=hour, minute=minute,
+        id=job_id, replace_existing=True,
+        args=[reminder["user_id"], reminder["habit_name"], reminder["alarm_time"], reminder["days"]]
+    )
+
+def unschedule_reminder(user_id, habit_name):
+    job = scheduler.get_job(reminder_job_id(user_id, habit_name))
+    if job:
+        job.remove()
+
+def load_reminder_jobs():
+    """Schedule every stored reminder; called once at startup"""
+    try:
+        reminders = fetch_all_rows(lambda: db.supabase.table("reminders").select("*").order("user_id").order("habit_name"))
+        for r in reminders:
+            schedule_reminder(r)
+        print(f"Scheduled {len(reminders)} reminders")
+    except Exception as e:
+        print(f"Error loading reminders: {e}")
+
+@app.post("/reminders/set")
+def set_reminder(r: ReminderModel, user_id: str = Depends(current_user_id)):
+    try:
+        datetime.strptime(r.alarm_time, "%H:%M")
+        row = {
+            "user_id": user_id,
+            "habit_name": r.habit_name,
+            "alarm_time": r.alarm_time,
+            "days": r.days,
+            "enabled": r.enabled
+        }
+        result = db.supabase.table("reminders").upsert(row, on_conflict="user_id,habit_name").execute()
+        schedule_reminder(row)
+        return {"success": True, "reminder": result.data[0] if result.data else row}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/reminders/remove")
+def remove_reminder(r: ReminderKeyModel, user_id: str = Depends(current_user_id)):
+    try:
+        db.supabase.table("reminders").delete()\
+            .eq("user_id", user_id)\
+            .eq("habit_name", r.habit_name)\
+            .execute()
+        unschedule_reminder(user_id, r.habit_name)
+        return {"success": True, "message": "Reminder removed"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/reminders/list")
+def list_reminders(user_id: str = Depends(current_user_id)):
+    try:
+        result = db.supabase.table("reminders").select("*").eq("user_id", user_id).execute()
+        return {"success": True, "reminders": result.data}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/reminders/events")
+def reminder_events_for_user(user_id: str = Depends(current_user_id)):
+    """Return and clear the reminders that fired for a user since the last call"""
+    with reminder_events_lock:
+        events = list(reminder_events.pop(user_id, []))
+    return {"success": True, "events": events}
+
+load_reminder_jobs()
 
 @app.get("/")
 def root():
@@ -1,7 +1,10 @@
 # src/db.py
 import os
-from datetime import date, timedelta
-from supabase import create_client, Client
+import base64
+import json
+import uuid
+from datetime import date, datetime, timedelta
+from supabase import create_client, Client, acreate_client, AsyncClient
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,6 +12,16 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Shared async client for the API routes, created once at startup
+async_supabase: AsyncClient = None
+
+async def init_async_client():
+    """Create the shared async client if it does not exist yet."""
+    global async_supabase
+    if async_supabase is None:
+        async_supabase = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+    return async_supabase
+
 # -------------------------------
 # USERS
 # -------------------------------
@@ -49,108 +62,196 @@ def create_habit(user_id: str, name: str, description: str = None):
             "user_id": user_id,
             "completed": False
         }).execute()
-
-        # Update weekly performance only on Sunday
-        today = date.today()
-        if today.weekday() == 6:  # Sunday
-            update_weekly_performance(user_id)
+        bump_weekly_rollup(user_id, total_delta=1)
 
         return habit_id
     except Exception as e:
         print("Error in create_habit:", e)
         return None
 
-def get_habits(user_id: str):
+# Habits are listed in (created_at, habit_id) order and paged by keyset:
+# each page continues after the last row of the previous one.
+HABIT_FIELDS = ("habit_id", "user_id", "name", "description", "created_at")
+HABIT_CURSOR_FIELDS = ("created_at", "habit_id")
+
+def habit_columns(fields=None):
+    """select() string for the requested habit fields plus the cursor columns."""
+    fields = list(fields or HABIT_FIELDS)
+    unknown = [f for f in fields if f not in HABIT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown habit fields: {', '.join(unknown)}")
+    return ", ".join(dict.fromkeys(fields + list(HABIT_CURSOR_FIELDS)))
+
+def encode_habit_cursor(habit: dict) -> str:
+    key = [habit["created_at"], habit["habit_id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_habit_cursor(cursor: str):
+    """(created_at, habit_id) from a cursor; both are checked, as they go into a PostgREST filter."""
+    try:
+        created_at, habit_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(habit_id))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+
+def habits_query(client, user_id: str, columns: str, limit: int = None, after=None):
+    """Query for a user's live habits, ordered for keyset paging after (created_at, habit_id)."""
+    query = client.table("habits").select(columns).eq("user_id", user_id).is_("deleted_at", "null")
+    if after:
+        created_at, habit_id = after
+        query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",habit_id.gt.{habit_id})')
+    query = query.order("created_at").order("habit_id")
+    return query.limit(limit) if limit else query
+
+def get_habits(user_id: str, fields=None, limit: int = None, after=None):
     try:
-        resp = supabase.table("habits").select("*").eq("user_id", user_id).execute()
+        resp = habits_query(supabase, user_id, habit_columns(fields), limit, after).execute()
         return resp.data if resp.data else []
     except Exception as e:
         print("Error in get_habits:", e)
         return []
 
-def mark_habit_completed(habit_id: str):
-    today = date.today().isoformat()
+def mark_habit_completed(habit_id: str, user_id: str = None):
+    """
+    Complete today's log in one round trip. The complete_habit_today SQL
+    function upserts on (habit_id, date), checks ownership when user_id is
+    given and keeps weekly_rollups in step.
+    """
     try:
-        logs = supabase.table("habit_logs").select("*").eq("habit_id", habit_id).eq("date", today).execute()
-        user_id = get_user_id_from_habit(habit_id)
-        if logs.data and len(logs.data) > 0:
-            log_id = logs.data[0]["log_id"]
-            supabase.table("habit_logs").update({"completed": True}).eq("log_id", log_id).execute()
-        else:
-            resp = supabase.table("habit_logs").insert({
-                "habit_id": habit_id,
-                "user_id": user_id,
-                "completed": True
-            }).execute()
-            log_id = resp.data[0]["log_id"] if resp.data else None
-
-        # Update weekly performance only on Sunday
-        today_obj = date.today()
-        if today_obj.weekday() == 6 and user_id:
-            update_weekly_performance(user_id)
-
-        return {"habit_id": habit_id, "log_id": log_id}
+        resp = supabase.rpc(
+            "complete_habit_today", {"hid": habit_id, "uid": user_id, "day": date.today().isoformat()}
+        ).execute()
+        if not resp.data:
+            return {"error": "Habit not found."}
+        return {"habit_id": habit_id, "log_id": resp.data[0]["id"]}
     except Exception as e:
         print("Error in mark_habit_completed:", e)
         return {"error": "Failed to mark completed."}
 
-def delete_habit(habit_id: str):
+def delete_habit(habit_id: str, user_id: str = None, soft: bool = False):
+    """
+    Remove a habit in one round trip via the remove_habits SQL function.
+    Logs go with it through ON DELETE CASCADE; with soft=True the habit is
+    only marked deleted and purge_deleted_habits removes it later.
+    """
     try:
-        habit = supabase.table("habits").select("*").eq("habit_id", habit_id).execute()
-        if habit.data and len(habit.data) > 0:
-            user_id = habit.data[0]["user_id"]
-            supabase.table("habit_logs").delete().eq("habit_id", habit_id).execute()
-            supabase.table("habits").delete().eq("habit_id", habit_id).execute()
-
-            # Update weekly performance only on Sunday
-            if date.today().weekday() == 6:
-                update_weekly_performance(user_id)
-
-            return {"deleted": True, "habit_id": habit_id}
+        resp = supabase.rpc("remove_habits", {"hids": [habit_id], "uid": user_id, "soft": soft}).execute()
+        counts = resp.data or {}
+        if counts.get("habits_deleted"):
+            return {"deleted": True, "habit_id": habit_id, **counts}
         return {"error": "Habit not found."}
     except Exception as e:
         print("Error in delete_habit:", e)
         return {"error": "Failed to delete habit."}
 
-def get_user_id_from_habit(habit_id: str):
-    try:
-        resp = supabase.table("habits").select("user_id").eq("habit_id", habit_id).execute()
-        if resp.data and len(resp.data) > 0:
-            return resp.data[0]["user_id"]
-    except Exception as e:
-        print("Error in get_user_id_from_habit:", e)
-    return None
-
 # -------------------------------
 # WEEKLY PERFORMANCE
 # -------------------------------
-def update_weekly_performance(user_id: str):
+# Per-(user, week) counters in weekly_rollups, kept current by every log
+# change instead of scanning habit_logs when a report is requested.
+def week_start_for(day=None):
+    """Monday of the week containing day (default today)."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    day = day or date.today()
+    return day - timedelta(days=day.weekday())
+
+def _rollup_params(user_id, total_delta, completed_delta, day):
+    return {
+        "uid": user_id,
+        "wk": week_start_for(day).isoformat(),
+        "total_delta": total_delta,
+        "completed_delta": completed_delta
+    }
+
+def bump_weekly_rollup(user_id: str, total_delta: int = 0, completed_delta: int = 0, day=None):
+    """Atomically add to a user's weekly counters (see bump_weekly_rollup SQL function)."""
+    if not user_id or (not total_delta and not completed_delta):
+        return
     try:
-        supabase.rpc("update_weekly_performance_for_user", {"uid": user_id}).execute()
+        supabase.rpc("bump_weekly_rollup", _rollup_params(user_id, total_delta, completed_delta, day)).execute()
     except Exception as e:
-        print("Error in update_weekly_performance:", e)
+        print("Error in bump_weekly_rollup:", e)
+
+async def abump_weekly_rollup(user_id: str, total_delta: int = 0, completed_delta: int = 0, day=None):
+    """Async version of bump_weekly_rollup for the API routes."""
+    if not user_id or (not total_delta and not completed_delta):
+        return
+    try:
+        await async_supabase.rpc("bump_weekly_rollup", _rollup_params(user_id, total_delta, completed_delta, day)).execute()
+    except Exception as e:
+        print("Error in abump_weekly_rollup:", e)
+
+def rebuild_weekly_rollups(day=None):
+    """Recompute every user's counters for one week server-side, in a single statement."""
+    try:
+        supabase.rpc("rebuild_weekly_rollups", {"wk": week_start_for(day).isoformat()}).execute()
+    except Exception as e:
+        print("Error in rebuild_weekly_rollups:", e)
+
+def rollup_to_performance(row, week_start):
+    """Turn a weekly_rollups row (or None) into the weekly performance dict."""
+    total = row["total_logs"] if row else 0
+    completed = row["completed_logs"] if row else 0
+    completion_pct = round(completed / total * 100, 1) if total > 0 else 0
+    return {
+        "completion_pct": completion_pct,
+        "stars": min(5, int(completion_pct / 20)),  # 5 stars for 100%
+        "total_habits": total,
+        "completed_habits": completed,
+        "week_start": week_start.isoformat(),
+        "week_end": (week_start + timedelta(days=6)).isoformat()
+    }
 
 def get_weekly_performance(user_id: str):
+    week_start = week_start_for()
     try:
-        resp = supabase.table("weekly_performance").select("*").eq("user_id", user_id).execute()
-        return resp.data[0] if resp.data else {"completion_pct": 0, "stars": 0, "week_start": str(date.today())}
+        resp = supabase.table("weekly_rollups").select("total_logs, completed_logs")\
+            .eq("user_id", user_id)\
+            .eq("week_start", week_start.isoformat())\
+            .execute()
+        return rollup_to_performance(resp.data[0] if resp.data else None, week_start)
     except Exception as e:
         print("Error in get_weekly_performance:", e)
-        return {"completion_pct": 0, "stars": 0, "week_start": str(date.today())}
+        return rollup_to_performance(None, week_start)
+
+async def aget_weekly_performance(user_id: str):
+    """Async version of get_weekly_performance for the API routes."""
+    week_start = week_start_for()
+    resp = await async_supabase.table("weekly_rollups").select("total_logs, completed_logs")\
+        .eq("user_id", user_id)\
+        .eq("week_start", week_start.isoformat())\
+        .execute()
+    return rollup_to_performance(resp.data[0] if resp.data else None, week_start)
 
 # -------------------------------
 # DAILY STATUS
 # -------------------------------
-def end_of_day_status(user_id: str):
+def get_today_habit_logs(user_id: str):
+    """Return the user's habits with today's log embedded, fetched in one request."""
+    today = date.today().isoformat()
     try:
-        habits = get_habits(user_id)
-        today = date.today().isoformat()
-        status_list = []
-        for h in habits:
-            logs = supabase.table("habit_logs").select("*").eq("habit_id", h["habit_id"]).eq("date", today).execute()
-            completed = logs.data[0]["completed"] if logs.data else False
-            status_list.append({"habit_name": h["name"], "completed": completed})
-        return {"date": today, "status": status_list}
+        resp = supabase.table("habits")\
+            .select("habit_id, name, habit_logs(completed)")\
+            .eq("user_id", user_id)\
+            .is_("deleted_at", "null")\
+            .eq("habit_logs.date", today)\
+            .execute()
+        return resp.data if resp.data else []
     except Exception as e:
-        print("Error in end_of_day_status:", e)
+        print("Error in get_today_habit_logs:", e)
+        return None
+
+def end_of_day_status(user_id: str):
+    today = date.today().isoformat()
+    habits = get_today_habit_logs(user_id)
+    if habits is None:
         return {"error": "Failed to fetch today's status"}
+
+    status_list = []
+    for h in habits:
+        logs = h.get("habit_logs") or []
+        completed = any(log.get("completed") for log in logs)
+        status_list.append({"habit_name": h["name"], "completed": completed})
+    return {"date": today, "status": status_list}
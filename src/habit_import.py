@@ -0,0 +1,94 @@
+# src/habit_import.py
+import codecs
+import csv
+import json
+from datetime import date
+
+# Rows match /habit/export, so an export can be imported again as-is:
+#   habit_name (required), description, date (YYYY-MM-DD), completed
+MAX_NAME_LENGTH = 200
+TRUE_VALUES = {"true", "1", "yes", "y", "t"}
+FALSE_VALUES = {"false", "0", "no", "n", "f", ""}
+
+class ImportRowError(ValueError):
+    pass
+
+async def iter_lines(byte_chunks):
+    """Yield (line_number, text) from an async stream of bytes, one line at a time."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    line_number = 0
+    async for chunk in byte_chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield line_number + 1, pending.rstrip("\r")
+
+def _csv_fields(line: str):
+    try:
+        return next(csv.reader([line]))
+    except csv.Error as e:  # e.g. a field over csv.field_size_limit()
+        raise ImportRowError(f"invalid CSV: {e}")
+
+def parse_line(line: str, fmt: str, header=None) -> dict:
+    """One NDJSON object or CSV line (quoted fields may not span lines) as a dict."""
+    if fmt == "csv":
+        values = _csv_fields(line)
+        if len(values) > len(header):
+            raise ImportRowError(f"expected {len(header)} columns, got {len(values)}")
+        return dict(zip(header, values))
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ImportRowError(f"invalid JSON: {e.msg}")
+    except RecursionError:
+        raise ImportRowError("invalid JSON: nested too deeply")
+    if not isinstance(record, dict):
+        raise ImportRowError("expected a JSON object")
+    return record
+
+def parse_header(line: str):
+    header = [column.strip() for column in _csv_fields(line)]
+    if "habit_name" not in header:
+        raise ImportRowError("CSV header must include habit_name")
+    return header
+
+def _as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else "").strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ImportRowError(f"completed must be true or false, got {value!r}")
+
+def validate_record(record: dict, today: date = None) -> dict:
+    """Normalized {habit_name, description, date, completed}; date is None for a habit-only row."""
+    name = str(record.get("habit_name") or "").strip()
+    if not name:
+        raise ImportRowError("habit_name is required")
+    if len(name) > MAX_NAME_LENGTH:
+        raise ImportRowError(f"habit_name is longer than {MAX_NAME_LENGTH} characters")
+
+    day = None
+    raw_date = str(record.get("date") or "").strip()
+    if raw_date:
+        try:
+            day = date.fromisoformat(raw_date[:10])
+        except ValueError:
+            raise ImportRowError(f"date must be YYYY-MM-DD, got {raw_date!r}")
+        if day > (today or date.today()):
+            raise ImportRowError("date is in the future")
+
+    description = str(record.get("description") or "").strip()
+    return {
+        "habit_name": name,
+        "description": description or None,
+        "date": day.isoformat() if day else None,
+        "completed": _as_bool(record.get("completed")),
+    }
@@ -0,0 +1,116 @@
+# src/history_store.py
+import glob
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+HISTORY_DB = os.getenv(
+    "HABITHUB_HISTORY_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "habit_history.db"),
+)
+
+_local = threading.local()
+
+# -------------------------------
+# CONNECTION
+# -------------------------------
+def get_connection():
+    """Return this thread's connection to the history database."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(HISTORY_DB, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS habit_history (
+                user_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                habit_id TEXT NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                data TEXT NOT NULL,
+                PRIMARY KEY (user_id, date, habit_id)
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_habit_history_user_date ON habit_history (user_id, date)")
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+def _day(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+
+# -------------------------------
+# READ / WRITE
+# -------------------------------
+def save_day(user_id, day, habits):
+    """Replace a user's stored habits for one day."""
+    conn = get_connection()
+    day = _day(day)
+    rows = [
+        (str(user_id), day, str(h.get("habit_id", i)), 1 if h.get("completed") else 0, json.dumps(h, default=str))
+        for i, h in enumerate(habits)
+    ]
+    with conn:
+        conn.execute("DELETE FROM habit_history WHERE user_id = ? AND date = ?", (str(user_id), day))
+        conn.executemany(
+            "INSERT OR REPLACE INTO habit_history (user_id, date, habit_id, completed, data) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+
+def load_day(user_id, day):
+    """Return the habits stored for a user on one day."""
+    rows = get_connection().execute(
+        "SELECT data FROM habit_history WHERE user_id = ? AND date = ?",
+        (str(user_id), _day(day)),
+    ).fetchall()
+    return [json.loads(data) for (data,) in rows]
+
+def daily_totals(user_id, start, end):
+    """Return {date: (total, completed)} for a user between start and end inclusive."""
+    rows = get_connection().execute(
+        '''
+        SELECT date, COUNT(*), SUM(completed) FROM habit_history
+        WHERE user_id = ? AND date BETWEEN ? AND ?
+        GROUP BY date
+        ''',
+        (str(user_id), _day(start), _day(end)),
+    ).fetchall()
+    return {day: (total, completed or 0) for day, total, completed in rows}
+
+def delete_before(day):
+    """Delete history older than the given day. Returns the number of rows removed."""
+    conn = get_connection()
+    with conn:
+        cur = conn.execute("DELETE FROM habit_history WHERE date < ?", (_day(day),))
+    return cur.rowcount
+
+# -------------------------------
+# ONE-SHOT IMPORT OF habit_history_YYYYMMDD.json
+# -------------------------------
+def import_json_files(directory=".", remove=False):
+    """
+    Load every habit_history_YYYYMMDD.json file in directory into the store.
+    Returns the number of files imported.
+    """
+    imported = 0
+    for path in sorted(glob.glob(os.path.join(directory, "habit_history_*.json"))):
+        date_str = os.path.basename(path).replace("habit_history_", "").replace(".json", "")
+        try:
+            day = datetime.strptime(date_str, "%Y%m%d").date()
+            with open(path, "r") as f:
+                day_data = json.load(f)
+            for user_id, habits in day_data.items():
+                save_day(user_id, day, habits)
+            imported += 1
+            if remove:
+                os.remove(path)
+        except (ValueError, OSError) as e:
+            print(f"Skipping {path}: {e}")
+    return imported
+
+if __name__ == "__main__":
+    import sys
+    directory = sys.argv[1] if len(sys.argv) > 1 else "."
+    print(f"Imported {import_json_files(directory)} history files into {HISTORY_DB}")
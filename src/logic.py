@@ -30,24 +30,25 @@ def list_user_habits(user_id: str = None):
     return habits if habits else []
 
 
-def complete_habit(habit_id: str):
+def complete_habit(habit_id: str, user_id: str = None):
     """Mark a habit as completed for today."""
     if not habit_id:
         return {"error": "Habit ID is required."}
-    return db.mark_habit_completed(habit_id)
+    return db.mark_habit_completed(habit_id, user_id)
 
 
-def remove_habit(habit_id: str):
-    """Delete a habit."""
+def remove_habit(habit_id: str, user_id: str = None, soft: bool = False):
+    """Delete a habit (soft=True hides it now and purges its logs later)."""
     if not habit_id:
         return {"error": "Habit ID is required."}
-    return db.delete_habit(habit_id)
+    return db.delete_habit(habit_id, user_id, soft)
 
 
 def get_today_status(user_id: str = None):
     """Return today's status of all habits for a user."""
     if not user_id:
         user_id = db.ensure_demo_user()
+    # Habits and today's logs come back from a single joined query
     status = db.end_of_day_status(user_id)
     
     # Prepare summary for pie chart
@@ -62,6 +63,7 @@ def get_my_weekly_performance(user_id: str = None):
     """Return weekly performance for a user."""
     if not user_id:
         user_id = db.ensure_demo_user()
+    # A single weekly_rollups row, maintained as logs change
     performance = db.get_weekly_performance(user_id)
     
     # Ensure all keys exist for frontend display
@@ -69,4 +71,4 @@ def get_my_weekly_performance(user_id: str = None):
         "completion_pct": performance.get("completion_pct", 0),
         "stars": performance.get("stars", 0),
         "week_start": str(performance.get("week_start", date.today()))
-    }
+    }
\ No newline at end of file
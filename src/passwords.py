@@ -0,0 +1,172 @@
+# src/passwords.py
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from argon2 import PasswordHasher as _Argon2PasswordHasher
+    from argon2.exceptions import VerifyMismatchError, InvalidHashError
+except ImportError:  # argon2-cffi is optional
+    _Argon2PasswordHasher = None
+
+# -------------------------------
+# HASHERS
+# -------------------------------
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+class LegacySha256Hasher:
+    """Unsalted SHA-256 hex digests from before KDF hashing; verify only."""
+    scheme = "sha256"
+
+    def identify(self, stored: str) -> bool:
+        return len(stored) == 64 and all(c in "0123456789abcdef" for c in stored)
+
+    def hash(self, password: str) -> str:
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password: str, stored: str) -> bool:
+        return hmac.compare_digest(self.hash(password), stored)
+
+    def needs_rehash(self, stored: str) -> bool:
+        return True
+
+class ScryptHasher:
+    """scrypt from the standard library, stored as scrypt$n$r$p$salt$hash."""
+    scheme = "scrypt"
+
+    def __init__(self, n: int = 2**14, r: int = 8, p: int = 1):
+        self.n, self.r, self.p = n, r, p
+
+    def identify(self, stored: str) -> bool:
+        return stored.startswith("scrypt$")
+
+    def _derive(self, password, salt, n, r, p):
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p, dklen=32)
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(16)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return f"scrypt${self.n}${self.r}${self.p}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password: str, stored: str) -> bool:
+        try:
+            _, n, r, p, salt, digest = stored.split("$")
+            expected = base64.b64decode(digest)
+            actual = self._derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, stored: str) -> bool:
+        return stored.split("$")[1:4] != [str(self.n), str(self.r), str(self.p)]
+
+class Argon2Hasher:
+    """argon2id via argon2-cffi, if installed."""
+    scheme = "argon2"
+
+    def __init__(self, time_cost: int = 3, memory_cost: int = 65536, parallelism: int = 1):
+        if _Argon2PasswordHasher is None:
+            raise RuntimeError("argon2-cffi is not installed")
+        self.time_cost, self.memory_cost, self.parallelism = time_cost, memory_cost, parallelism
+        self._hasher = _Argon2PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+    def identify(self, stored: str) -> bool:
+        return stored.startswith("$argon2")
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, stored: str) -> bool:
+        try:
+            return self._hasher.verify(stored, password)
+        except (VerifyMismatchError, InvalidHashError):
+            return False
+
+    def needs_rehash(self, stored: str) -> bool:
+        return self._hasher.check_needs_rehash(stored)
+
+def hasher_from_env():
+    """Build the hasher for new passwords from HABITHUB_PASSWORD_* settings."""
+    scheme = os.getenv("HABITHUB_PASSWORD_HASHER", "scrypt")
+    if scheme == "argon2":
+        return Argon2Hasher(
+            time_cost=int(os.getenv("HABITHUB_ARGON2_TIME_COST", "3")),
+            memory_cost=int(os.getenv("HABITHUB_ARGON2_MEMORY_COST", "65536")),
+        )
+    return ScryptHasher(n=int(os.getenv("HABITHUB_SCRYPT_N", str(2**14))))
+
+# The current hasher hashes new passwords; the rest can still verify old ones
+current_hasher = hasher_from_env()
+_known_hashers = [current_hasher, ScryptHasher(), LegacySha256Hasher()]
+if _Argon2PasswordHasher is not None and current_hasher.scheme != "argon2":
+    _known_hashers.append(Argon2Hasher())
+
+def _hasher_for(stored: str):
+    for hasher in _known_hashers:
+        if hasher.identify(stored):
+            return hasher
+    return None
+
+# -------------------------------
+# API
+# -------------------------------
+def hash_password(password: str) -> str:
+    return current_hasher.hash(password)
+
+_dummy_hash = None
+
+def dummy_hash() -> str:
+    """A current_hasher hash of a random password, made on first use."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = current_hasher.hash(secrets.token_hex(16))
+    return _dummy_hash
+
+def verify_password(password: str, stored: str) -> bool:
+    if not stored:
+        # Unknown user: pay the same KDF cost so timing does not reveal it
+        current_hasher.verify(password, dummy_hash())
+        return False
+    hasher = _hasher_for(stored)
+    return bool(hasher) and hasher.verify(password, stored)
+
+def needs_rehash(stored: str) -> bool:
+    """True if stored was not made by the current hasher with its current cost."""
+    return not current_hasher.identify(stored) or current_hasher.needs_rehash(stored)
+
+# KDF work runs here so it never blocks the API's event loop
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("HABITHUB_PASSWORD_WORKERS", str(os.cpu_count() or 2))))
+
+async def ahash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_pool, hash_password, password)
+
+async def averify_password(password: str, stored: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_pool, verify_password, password, stored)
+
+# -------------------------------
+# BENCHMARK
+# -------------------------------
+def benchmark(costs=(2**12, 2**13, 2**14, 2**15), seconds: float = 2.0, workers: int = None):
+    """Print scrypt logins/second (verify throughput) for each cost setting."""
+    workers = workers or os.cpu_count() or 2
+    print(f"scrypt verify throughput with {workers} workers")
+    for n in costs:
+        hasher = ScryptHasher(n=n)
+        stored = hasher.hash("benchmark-password")
+        done = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while time.perf_counter() - started < seconds:
+                done += sum(pool.map(lambda _: hasher.verify("benchmark-password", stored), range(workers)))
+        elapsed = time.perf_counter() - started
+        print(f"  N={n:>6}: {done / elapsed:8.1f} logins/s  ({elapsed / done * 1000 * workers:.1f} ms each)")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,44 @@
+# src/session_tokens.py
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+SESSION_TTL = int(os.getenv("HABITHUB_SESSION_TTL", str(7 * 24 * 3600)))
+
+_secret = os.getenv("HABITHUB_SESSION_SECRET")
+if not _secret:
+    # Tokens then only survive as long as this process
+    print("HABITHUB_SESSION_SECRET is not set; using a random per-process secret")
+    _secret = secrets.token_hex(32)
+SECRET = _secret.encode()
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(SECRET, payload.encode(), hashlib.sha256).digest())
+
+def issue_token(user_id: str, ttl: int = SESSION_TTL) -> str:
+    """Signed, stateless session token: base64(payload).base64(hmac)."""
+    payload = _b64encode(json.dumps({"uid": user_id, "exp": int(time.time()) + ttl}).encode())
+    return f"{payload}.{_sign(payload)}"
+
+def verify_token(token: str):
+    """Return the token's user_id, or None if it is malformed, forged or expired."""
+    try:
+        payload, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        claims = json.loads(_b64decode(payload))
+        if claims["exp"] < time.time():
+            return None
+        return claims["uid"]
+    except (ValueError, KeyError, TypeError):
+        return None
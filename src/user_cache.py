@@ -0,0 +1,42 @@
+# src/user_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class UserCache:
+    """Bounded LRU of user rows keyed by email, each entry valid for ttl seconds."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, email: str):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[email]
+                return None
+            self._entries.move_to_end(email)
+            return dict(user)
+
+    def put(self, email: str, user: dict):
+        with self._lock:
+            self._entries[email] = (time.monotonic() + self.ttl, dict(user))
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str):
+        with self._lock:
+            self._entries.pop(email, None)
+
+users_by_email = UserCache(
+    maxsize=int(os.getenv("HABITHUB_USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("HABITHUB_USER_CACHE_TTL", "300")),
+)